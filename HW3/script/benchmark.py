@@ -0,0 +1,307 @@
+import argparse
+import json
+import multiprocessing
+import platform
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tracemalloc
+from collections import defaultdict
+from datetime import datetime
+from time import perf_counter
+
+import homework
+
+# Every generate_* function of homework.py, keyed by its table name.
+GENERATORS = {
+    'users': homework.generate_users,
+    'category': homework.generate_categories,
+    'brand': homework.generate_brands,
+    'product': homework.generate_products,
+    'product_image': homework.generate_product_images,
+    'invoice': homework.generate_invoices,
+    'invoice_item': homework.generate_invoice_items,
+    'contact_reply': homework.generate_contact_replies,
+}
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+# Which column a value source feeds. Sources not listed are reported under
+# their own method name.
+COLUMN_LABELS = {
+    'first_name': 'first_name',
+    'last_name': 'last_name',
+    'word': 'name',
+    'company': 'name',
+    'catch_phrase': 'name',
+    'paragraph': 'description',
+    'name': 'payment_account_name',
+    'bban': 'payment_account_number',
+    'get': 'address',
+    'current_time': 'timestamps',
+}
+
+
+class TimedProxy:
+    """Forwards calls to target and adds the time each call takes to totals[label]."""
+
+    def __init__(self, target, totals, default_label=None):
+        self._target = target
+        self._totals = totals
+        self._default_label = default_label
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name == 'unique':
+            return TimedProxy(attr, self._totals, self._default_label)
+        if not callable(attr):
+            return attr
+        return timed(attr, self._totals, self._default_label or COLUMN_LABELS.get(name, name))
+
+
+class TimedLookups(dict):
+    """A copy of mapping whose lookups add their time to totals[label]."""
+
+    def __init__(self, mapping, totals, label):
+        super().__init__(mapping)
+        self._totals = totals
+        self._label = label
+
+    def __getitem__(self, key):
+        start = perf_counter()
+        try:
+            return super().__getitem__(key)
+        finally:
+            self._totals[self._label] += perf_counter() - start
+
+
+def timed(function, totals, label):
+    """Wraps function so its run time is added to totals[label]."""
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            totals[label] += perf_counter() - start
+    return wrapper
+
+
+def prepare(table_name, seed, parent_rows, pool_size, vectorized):
+    """Seeds homework and fills the id lists of the table's parents with parent_rows ids."""
+    homework.run_clock = datetime(2025, 1, 1, 12, 0, 0)
+    homework.use_vectorized(vectorized)
+    homework.use_value_pools(pool_size, seed)
+    homework.use_address_store(seed)
+    homework.use_product_prices(seed)
+    homework.use_names(seed)
+    homework.seed_generators(seed)
+    for ids in homework.TABLE_ID_LISTS.values():
+        ids.clear()
+    parents = homework.TABLE_DEPENDENCIES[table_name] + homework.OPTIONAL_DEPENDENCIES.get(table_name, ())
+    for parent in parents:
+        homework.TABLE_ID_LISTS[parent].assign(range(1, parent_rows + 1))
+
+
+def measure_speed(table_name, rows, seed, parent_rows, pool_size, vectorized=False):
+    """Times one generate_* call; runs in a fresh process so peak RSS belongs to this call alone."""
+    prepare(table_name, seed, parent_rows, pool_size, vectorized)
+    start = perf_counter()
+    GENERATORS[table_name](rows)
+    seconds = perf_counter() - start
+    return {
+        'seconds': seconds,
+        'rows_per_sec': rows / seconds if seconds else None,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def measure_allocations(table_name, rows, seed, parent_rows, pool_size, vectorized=False):
+    """Returns the tracemalloc peak per generated row of one generate_* call."""
+    prepare(table_name, seed, parent_rows, pool_size, vectorized)
+    tracemalloc.start()
+    GENERATORS[table_name](rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'traced_peak_bytes_per_row': peak / rows if rows else None}
+
+
+def measure_columns(table_name, rows, seed, parent_rows, pool_size, vectorized=False):
+    """Returns the seconds per row spent producing each column's values."""
+    totals = defaultdict(float)
+    prepare(table_name, seed, parent_rows, pool_size, vectorized)
+    homework.fake = TimedProxy(homework.fake, totals)
+    homework.canada_fake = TimedProxy(homework.canada_fake, totals)
+    homework.vietnam_fake = TimedProxy(homework.vietnam_fake, totals)
+    homework.address_store.get = timed(homework.address_store.get, totals, 'address')
+    homework.current_time = timed(homework.current_time, totals, 'timestamps')
+    homework.format_timestamp = timed(homework.format_timestamp, totals, 'timestamps')
+    homework.date_of_birth = timed(homework.date_of_birth, totals, 'dob')
+    homework.GeneratedNames.unique_name = timed(homework.GeneratedNames.unique_name, totals, 'name')
+    homework.unique_email = timed(homework.unique_email, totals, 'email')
+    homework.password_digests = TimedLookups(homework.password_digests, totals, 'password')
+    homework.random = TimedProxy(homework.random, totals, 'random draws')
+
+    start = perf_counter()
+    GENERATORS[table_name](rows)
+    total = perf_counter() - start
+    columns = {label: seconds / rows for label, seconds in sorted(totals.items(), key=lambda item: -item[1])}
+    columns['other (row assembly)'] = max(total - sum(totals.values()), 0.0) / rows
+    return {'column_seconds_per_row': columns}
+
+
+HOMEWORK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'homework.py')
+STARTUP_ROWS = 10
+
+
+def time_command(command, runs):
+    """Runs command runs times from homework.py's directory; returns the wall-clock seconds of each run."""
+    seconds = []
+    for _ in range(runs):
+        start = perf_counter()
+        subprocess.run(command, check=True, cwd=os.path.dirname(HOMEWORK),
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        seconds.append(perf_counter() - start)
+    return seconds
+
+
+def measure_startup(tables, runs, seed):
+    """Returns the cold-start time of importing homework and of a STARTUP_ROWS-row run per table."""
+    commands = [('import', [sys.executable, '-c', 'import homework'])]
+    commands += [
+        (table_name, [sys.executable, HOMEWORK, table_name, str(STARTUP_ROWS), '--seed', str(seed),
+                      '--progress', '0', '-o', os.devnull])
+        for table_name in tables
+    ]
+    results = []
+    for name, command in commands:
+        try:
+            seconds = time_command(command, runs)
+        except (OSError, subprocess.CalledProcessError) as error:
+            stderr = getattr(error, 'stderr', None)
+            detail = stderr.decode(errors='replace').strip().splitlines()[-1] if stderr else str(error)
+            results.append({'table': name, 'error': f"{type(error).__name__}: {detail}"})
+            print(f"{name:>14} startup  failed: {results[-1]['error']}", file=sys.stderr)
+            continue
+        results.append({'table': name, 'median_seconds': statistics.median(seconds), 'min_seconds': min(seconds)})
+        print(f"{name:>14} startup  {results[-1]['median_seconds'] * 1000:>8.0f} ms median of {runs}", file=sys.stderr)
+    return results
+
+
+def _run_isolated(task):
+    measure, args = task
+    return measure(*args)
+
+
+def run_isolated(measure, *args):
+    """Runs a measurement in its own spawned process and returns its result."""
+    with multiprocessing.get_context('spawn').Pool(1) as pool:
+        return pool.apply(_run_isolated, ((measure, args),))
+
+
+def run_benchmarks(tables, sizes, seed, parent_rows, pool_size, profile_rows, vectorized=False):
+    """Benchmarks every table at every size; returns one result dict per (table, size)."""
+    results = []
+    for table_name in tables:
+        for rows in sizes:
+            result = {'table': table_name, 'rows': rows}
+            results.append(result)
+            sample = min(rows, profile_rows)
+            try:
+                arguments = (seed, parent_rows, pool_size, vectorized)
+                result.update(run_isolated(measure_speed, table_name, rows, *arguments))
+                result['profile_rows'] = sample
+                result.update(run_isolated(measure_allocations, table_name, sample, *arguments))
+                result.update(run_isolated(measure_columns, table_name, sample, *arguments))
+            except Exception as error:
+                result['error'] = f"{type(error).__name__}: {error}"
+                print(f"{table_name:>14} {rows:>9} rows  failed: {result['error']}", file=sys.stderr)
+                continue
+            print(f"{table_name:>14} {rows:>9} rows  {result['rows_per_sec']:>10.0f} rows/s  "
+                  f"peak RSS {result['peak_rss_kb'] / 1024:>8.1f} MiB  "
+                  f"{result['traced_peak_bytes_per_row']:>8.0f} B/row", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline, threshold, startup=()):
+    """Returns a message for every (table, rows) whose rows/sec fell more than threshold below baseline,
+    and for every table whose startup time grew by more than threshold."""
+    previous = {(entry['table'], entry['rows']): entry for entry in baseline['results']}
+    regressions = []
+    previous_startup = {entry['table']: entry for entry in baseline.get('startup', [])}
+    for entry in startup:
+        old = previous_startup.get(entry['table'])
+        if not old or 'median_seconds' not in old or 'median_seconds' not in entry:
+            continue
+        change = entry['median_seconds'] / old['median_seconds'] - 1
+        if change > threshold:
+            regressions.append(f"{entry['table']} startup: {old['median_seconds'] * 1000:.0f} -> "
+                               f"{entry['median_seconds'] * 1000:.0f} ms ({change:+.1%})")
+    for entry in results:
+        old = previous.get((entry['table'], entry['rows']))
+        if not old or not old.get('rows_per_sec') or not entry.get('rows_per_sec'):
+            continue
+        change = entry['rows_per_sec'] / old['rows_per_sec'] - 1
+        if change < -threshold:
+            regressions.append(f"{entry['table']} at {entry['rows']} rows: "
+                               f"{old['rows_per_sec']:.0f} -> {entry['rows_per_sec']:.0f} rows/s ({change:+.1%})")
+    return regressions
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the homework.py generators.")
+    parser.add_argument('--tables', default=','.join(GENERATORS),
+                        help="comma-separated tables to benchmark (default: all)")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="comma-separated row counts")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--parent-rows', type=int, default=1000,
+                        help="ids available in each parent table")
+    parser.add_argument('--pool-size', type=int, default=0, help="benchmark with homework --pool-size")
+    parser.add_argument('--vectorized', action='store_true', help="benchmark with homework --vectorized")
+    parser.add_argument('--profile-rows', type=int, default=10000,
+                        help="rows used for the tracemalloc and per-column runs, which are slower")
+    parser.add_argument('--startup-runs', type=int, default=0,
+                        help="also time this many cold starts of homework.py per table (0: skip)")
+    parser.add_argument('--output', '-o', default='benchmark.json', help="where to write the JSON results")
+    parser.add_argument('--compare', default=None, help="earlier JSON results to compare against")
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help="flag a table whose rows/sec dropped by more than this fraction")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    tables = args.tables.split(',')
+    sizes = [int(size) for size in args.sizes.split(',')]
+    results = run_benchmarks(tables, sizes, args.seed, args.parent_rows, args.pool_size, args.profile_rows,
+                             args.vectorized)
+    startup = measure_startup(tables, args.startup_runs, args.seed) if args.startup_runs > 0 else []
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'parent_rows': args.parent_rows,
+            'pool_size': args.pool_size,
+            'vectorized': args.vectorized,
+        },
+        'results': results,
+        'startup': startup,
+    }
+    with open(args.output, 'w') as out:
+        json.dump(report, out, indent=2)
+    print(f"Wrote {len(results)} results to {args.output}.", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.threshold, startup)
+        for message in regressions:
+            print(f"SLOWER: {message}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,297 @@
+import argparse
+import base64
+import bisect
 import csv
+import functools
+import os
 import random
-from datetime import datetime, timedelta
-from faker import Faker
+import shutil
+import sqlite3
+import tempfile
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, nullcontext
+from datetime import date, datetime, timedelta
+from importlib import import_module
+from itertools import accumulate, islice
 import hashlib
+import json
+import math
+import mmap
+import re
 import sys
+import threading
+import unicodedata
+from time import perf_counter
+
+try:
+    import bcrypt
+except ImportError:  # only needed for --password-algorithm bcrypt
+    bcrypt = None
+
+try:
+    from argon2.low_level import Type as Argon2Type, hash_secret as argon2_hash_secret
+except ImportError:  # only needed for --password-algorithm argon2
+    argon2_hash_secret = None
+
+# pyarrow is imported by _require_pyarrow, only for --format parquet / arrow.
+pa = pc = pq = None
+# numpy is imported by use_vectorized, only for --vectorized.
+np = None
+
+# Worker processes come from a fork server (a fresh interpreter where there is
+# none), never from forking this process: generate_schema starts pools from
+# several threads at once, and forking a threaded process can deadlock. Workers
+# get every setting through their initializer, not by inheriting it.
+# multiprocessing itself is only imported once a run needs other processes.
+@functools.lru_cache(maxsize=None)
+def process_context():
+    """Returns the multiprocessing context worker pools and their shared counters come from."""
+    import multiprocessing
+    return multiprocessing.get_context(
+        'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+
+
+# --- Lazy Faker instances ---
+# Importing faker and building a multi-locale Faker take a good part of a
+# second. Neither happens until a Faker value is actually needed, so a small
+# category or brand run, or an address in one country, never pays for the rest.
+_faker_class = None
+_faker_seed = None
+
+
+def new_faker(locales):
+    """Returns a new Faker for locales, importing faker on first use."""
+    global _faker_class
+    if _faker_class is None:
+        from faker import Faker
+        _faker_class = Faker
+        if _faker_seed is not None:
+            Faker.seed(_faker_seed)
+    return _faker_class(list(locales))
+
+
+def seed_faker(seed):
+    """Seeds the random state shared by every Faker without a seed of its own."""
+    global _faker_seed
+    _faker_seed = seed
+    if _faker_class is not None:
+        _faker_class.seed(seed)
+
+
+class LazyFaker:
+    """A Faker for locales that is only built, and seeded with seed if given, on first use."""
+
+    def __init__(self, locales, seed=None):
+        self.locales = list(locales)
+        self._seed = seed
+        self._faker = None
+
+    def __getattr__(self, name):
+        # Attributes are not cached: a multi-locale Faker picks the locale on every lookup.
+        if self._faker is None:
+            self._faker = new_faker(self.locales)
+            if self._seed is not None:
+                self._faker.seed_instance(self._seed)
+        return getattr(self._faker, name)
+
 
 # Initialize Faker for generating realistic data with general locales.
-fake = Faker(['en_US', 'en_GB', 'en_AU', 'de_DE'])
+GENERAL_LOCALES = ('en_US', 'en_GB', 'en_AU', 'de_DE')
+fake = LazyFaker(GENERAL_LOCALES)
 
 # Create separate Faker instances specifically for highly locale-specific methods
-vietnam_fake = Faker('vi_VN')
-canada_fake = Faker('en_CA') 
+vietnam_fake = LazyFaker(['vi_VN'])
+canada_fake = LazyFaker(['en_CA'])
+
+# Rows are handed to the CSV writer in batches of this size, so only one batch
+# is ever held in memory no matter how many rows a table has.
+STREAM_BATCH_SIZE = 10000
+
+
+# --- Foreign key id registries ---
+# A table's ids almost always run 1..N, which a range stores in a few bytes
+# whatever N is. Anything else (ids that skip or start elsewhere) falls back to
+# an array('I'), four bytes per id. Either way picking an id is O(1) indexing.
+class IdRegistry:
+    """The ids generated for one table, for other tables to reference."""
+
+    def __init__(self, ids=()):
+        self.assign(ids)
+
+    def assign(self, ids):
+        """Replaces the registry's ids with ids."""
+        if isinstance(ids, IdRegistry):
+            ids = ids._ids
+        if isinstance(ids, range) and ids.step == 1 and (ids.start == 1 or not ids):
+            self._ids = range(1, ids.stop) if ids else range(1, 1)
+        else:
+            self._ids = array('I', ids)
+            if all(index == value for index, value in enumerate(self._ids, 1)):
+                self._ids = range(1, len(self._ids) + 1)
+
+    def append(self, id_):
+        ids = self._ids
+        if isinstance(ids, range):
+            if id_ == len(ids) + 1:
+                self._ids = range(1, id_ + 1)
+                return
+            ids = self._ids = array('I', ids)
+        ids.append(id_)
+
+    def extend(self, ids):
+        if isinstance(self._ids, range) and isinstance(ids, range) and ids.step == 1 \
+                and ids.start == len(self._ids) + 1:
+            self._ids = range(1, max(ids.stop, ids.start))
+            return
+        for id_ in ids:
+            self.append(id_)
+
+    def clear(self):
+        self._ids = range(1, 1)
+
+    def take(self, indexes):
+        """Returns the ids at a NumPy array of indexes as a NumPy array."""
+        if isinstance(self._ids, range):
+            return indexes + 1
+        return np.frombuffer(self._ids, dtype=np.uint32)[indexes]
+
+    def fingerprint(self):
+        """Returns a short string that changes whenever the ids do."""
+        if isinstance(self._ids, range):
+            return f"1..{len(self._ids)}"
+        return hashlib.sha256(self._ids.tobytes()).hexdigest()[:16]
+
+    def position(self, id_):
+        """Returns the index of id_ (ids are kept in ascending order)."""
+        if isinstance(self._ids, range):
+            return id_ - 1
+        return bisect.bisect_left(self._ids, id_)
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, index):
+        return self._ids[index]
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __repr__(self):
+        return f"IdRegistry({self._ids!r})"
+
 
+# The registries of the module-level generator functions; see GeneratorSession
+# for independent ones.
+user_ids = IdRegistry()
+category_ids = IdRegistry()
+product_ids = IdRegistry()
+invoice_ids = IdRegistry()
+brand_ids = IdRegistry()
+
+# When set, every timestamp column reads this instead of the wall clock, so the
+# shards of one run agree on "now".
+run_clock = None
+
+
+def current_time():
+    """Returns the run clock if one is set, otherwise the wall clock."""
+    return run_clock if run_clock is not None else datetime.now()
+
+
+# --- Timestamp columns ---
+# Timestamps are handled as whole seconds since 1970-01-01 (naive, like the run
+# clock). A timestamp column draws its offsets from the clock a batch at a time
+# from one of TIMESTAMP_DISTRIBUTIONS, and format_timestamp only runs strftime
+# once per calendar day; the time of day is plain integer formatting.
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+TIMESTAMP_BATCH_SIZE = 1024
+EPOCH = datetime(1970, 1, 1)
+DAY = 86400
+DAYS_BACK = range(1, 366)
+MINUTE_OFFSETS = range(60, 3601, 60)
+WEEKDAY_WEIGHTS = (1.0, 1.0, 1.0, 1.0, 0.9, 0.35, 0.25)  # Monday first
+BUSINESS_HOUR_WEIGHTS = (
+    0.2, 0.1, 0.1, 0.1, 0.1, 0.2, 0.5, 1.0, 3.0, 6.0, 8.0, 8.0,
+    6.0, 7.0, 8.0, 8.0, 7.0, 5.0, 3.0, 2.0, 1.5, 1.0, 0.6, 0.3,
+)
+SEASONAL_MONTH_WEIGHTS = (0.8, 0.7, 0.8, 0.85, 0.9, 0.9, 0.85, 0.9, 1.0, 1.1, 1.5, 1.8)  # January first
+_BUSINESS_HOUR_CUM_WEIGHTS = list(accumulate(BUSINESS_HOUR_WEIGHTS))
+
+
+def clock_seconds(clock=None):
+    """Returns clock (default: current_time()) as whole seconds since 1970-01-01."""
+    return int(((clock or current_time()) - EPOCH).total_seconds())
+
+
+@functools.lru_cache(maxsize=4096)
+def _format_day(day):
+    return (EPOCH + timedelta(days=day)).strftime('%Y-%m-%d')
+
+
+def format_timestamp(seconds):
+    """Formats seconds since 1970-01-01 as YYYY-MM-DD HH:MM:SS."""
+    day, rest = divmod(seconds, DAY)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{_format_day(day)} {hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+@functools.lru_cache(maxsize=16)
+def _day_cum_weights(today, seasonal):
+    weights = []
+    for days_back in DAYS_BACK:
+        day = EPOCH + timedelta(days=today - days_back)
+        weight = WEEKDAY_WEIGHTS[day.weekday()]
+        if seasonal:
+            weight *= SEASONAL_MONTH_WEIGHTS[day.month - 1]
+        weights.append(weight)
+    return list(accumulate(weights))
+
+
+def _draw_days_back(now, count, rng):
+    # Whole days within the last year, at the clock's time of day.
+    return [now - days * DAY for days in rng.choices(DAYS_BACK, k=count)]
+
+
+def _draw_minutes_back(now, count, rng):
+    # Whole minutes within the last hour.
+    return [now - offset for offset in rng.choices(MINUTE_OFFSETS, k=count)]
+
+
+def _draw_working_time(now, count, rng, seasonal):
+    today = now // DAY
+    days = rng.choices(DAYS_BACK, cum_weights=_day_cum_weights(today, seasonal), k=count)
+    hours = rng.choices(range(24), cum_weights=_BUSINESS_HOUR_CUM_WEIGHTS, k=count)
+    return [(today - day) * DAY + hour * 3600 + rng.randrange(3600) for day, hour in zip(days, hours)]
+
+
+TIMESTAMP_DISTRIBUTIONS = {
+    'days': _draw_days_back,
+    'minutes': _draw_minutes_back,
+    # Within the last year, weekdays and office hours more likely.
+    'business-hours': functools.partial(_draw_working_time, seasonal=False),
+    # As business-hours, with busier autumn and year-end months.
+    'seasonal': functools.partial(_draw_working_time, seasonal=True),
+}
+INVOICE_DATE_DISTRIBUTIONS = ('days', 'business-hours', 'seasonal')
+invoice_date_distribution = 'days'
+
+
+def use_invoice_dates(distribution):
+    """Sets the distribution invoice dates are drawn from."""
+    global invoice_date_distribution
+    if distribution not in TIMESTAMP_DISTRIBUTIONS:
+        raise ValueError(f"unknown timestamp distribution {distribution!r}")
+    invoice_date_distribution = distribution
+
+
+def timestamp_column(distribution, now, rng=random, batch_size=TIMESTAMP_BATCH_SIZE):
+    """Yields timestamps (seconds since 1970-01-01) before now, drawn batch_size at a time with rng."""
+    draw = TIMESTAMP_DISTRIBUTIONS[distribution]
+    while True:
+        yield from draw(now, batch_size, rng)
 
-# --- Global lists to store generated IDs for foreign key relationships ---
-user_ids = []
-category_ids = []
-product_ids = []
-invoice_ids = []
-brand_ids = []
 
 # --- Predefined Vietnamese address components ---
 vietnamese_wards = [
@@ -38,191 +311,878 @@ vietnamese_districts = [
 ]
 
 
-def generate_users(num_users):
+# --- Pooled value providers ---
+# Multi-locale Faker calls are slow. A PooledFaker calls Faker pool_size times
+# per (method, arguments) up front and then serves rows by drawing a random
+# index into that pool with rng. Smaller pools are faster to build but repeat values
+# more often.
+_plain_fakers = (fake, canada_fake, vietnam_fake)
+value_pool_size = 0
+value_pool_seed = 0
+
+
+class PooledFaker:
+    """Serves Faker values from pre-generated pools instead of calling Faker for every row."""
+
+    def __init__(self, faker, pool_size, seed, rng=random):
+        self._faker = faker
+        self._pool_size = pool_size
+        self._seed = seed
+        self._rng = rng
+        self._source = None
+        self._pools = {}
+
+    def __getattr__(self, name):
+        # Checked on the pool source, which is built anyway, so the wrapped
+        # (lazy) Faker is only built for proxies such as fake.unique, which keep
+        # going to the real instance.
+        if not callable(getattr(self._source_faker(), name)):
+            return getattr(self._faker, name)
+
+        def pooled(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items()))) if args or kwargs else name
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = self._build_pool(name, key, args, kwargs)
+            return pool[int(self._rng.random() * len(pool))]
+
+        setattr(self, name, pooled)
+        return pooled
+
+    def _source_faker(self):
+        if self._source is None:
+            self._source = new_faker(self._faker.locales)
+        return self._source
+
+    def _build_pool(self, name, key, args, kwargs):
+        # Pools come from a private Faker seeded per key, so their contents do not
+        # depend on which shard or worker happens to build them first.
+        source = self._source_faker()
+        source.seed_instance(derive_seed(self._seed, repr(key)))
+        method = getattr(source, name)
+        return [method(*args, **kwargs) for _ in range(self._pool_size)]
+
+
+def use_value_pools(pool_size, seed=0):
+    """Swaps fake, canada_fake and vietnam_fake for pooled providers; pool_size 0 restores plain Faker."""
+    global fake, canada_fake, vietnam_fake, value_pool_size, value_pool_seed
+    value_pool_size = pool_size
+    value_pool_seed = seed
+    if pool_size:
+        fake, canada_fake, vietnam_fake = (
+            PooledFaker(faker, pool_size, derive_seed(seed, 'pool', index))
+            for index, faker in enumerate(_plain_fakers)
+        )
+    else:
+        fake, canada_fake, vietnam_fake = _plain_fakers
+
+
+# --- Credentials ---
+# Every user gets one of a few plaintext passwords. A slow hash (bcrypt at cost
+# 10 takes tens of milliseconds) is computed once per distinct
+# (plaintext, algorithm, cost) and the digest is reused for every row.
+PASSWORD_ALGORITHMS = ('sha256', 'bcrypt', 'argon2')
+DEFAULT_PASSWORDS = ['password123']
+DEFAULT_PASSWORD_COST = 10
+
+_password_hash_cache = {}
+password_plaintexts = []
+password_digests = {}
+
+_BCRYPT_ALPHABET = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    b"./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789",
+)
+
+
+def hash_password(plaintext, algorithm, cost=DEFAULT_PASSWORD_COST, seed=0):
+    """Hashes a plaintext password; the salt is derived from seed so reruns give the same digest."""
+    if algorithm == 'sha256':
+        return hashlib.sha256(plaintext.encode()).hexdigest()
+    salt = hashlib.sha256(f"{seed}:{algorithm}:{cost}:{plaintext}".encode()).digest()[:16]
+    if algorithm == 'bcrypt':
+        if bcrypt is None:
+            raise RuntimeError("bcrypt hashing needs the bcrypt package (pip install bcrypt)")
+        bcrypt_salt = f"$2b${cost:02d}$".encode() + base64.b64encode(salt)[:22].translate(_BCRYPT_ALPHABET)
+        # Laravel writes the $2y$ prefix; the algorithm is the same as $2b$.
+        return '$2y$' + bcrypt.hashpw(plaintext.encode(), bcrypt_salt).decode()[4:]
+    if algorithm == 'argon2':
+        if argon2_hash_secret is None:
+            raise RuntimeError("argon2 hashing needs the argon2-cffi package (pip install argon2-cffi)")
+        return argon2_hash_secret(plaintext.encode(), salt, time_cost=cost, memory_cost=65536,
+                                  parallelism=1, hash_len=32, type=Argon2Type.ID).decode()
+    raise ValueError(f"Unknown password algorithm: {algorithm}")
+
+
+def _hash_password_task(task):
+    return task, hash_password(*task)
+
+
+def use_passwords(plaintexts, algorithm='sha256', cost=DEFAULT_PASSWORD_COST, seed=0, workers=1):
+    """Sets the passwords generated users get, hashing each distinct one once across a process pool."""
+    global password_plaintexts, password_digests
+    tasks = [(plaintext, algorithm, cost, seed) for plaintext in dict.fromkeys(plaintexts)]
+    missing = [task for task in tasks if task not in _password_hash_cache]
+    if len(missing) > 1 and workers > 1:
+        with process_context().Pool(min(workers, len(missing))) as pool:
+            _password_hash_cache.update(pool.map(_hash_password_task, missing))
+    else:
+        _password_hash_cache.update(map(_hash_password_task, missing))
+    password_plaintexts = [task[0] for task in tasks]
+    password_digests = {task[0]: _password_hash_cache[task] for task in tasks}
+
+
+def login_rows(users_path):
+    """Yields [email, plaintext password] for every user of a generated users CSV whose password is known."""
+    plaintext_by_digest = {digest: plaintext for plaintext, digest in password_digests.items()}
+    with open(users_path, newline='') as users_file:
+        for user in csv.DictReader(users_file):
+            plaintext = plaintext_by_digest.get(user['password'])
+            if plaintext is not None:
+                yield [user['email'], plaintext]
+
+
+def export_login_fixture(users_path, fixture_path, limit=None):
+    """Writes the email,password file k6 logs in with from a generated users CSV; returns the row count."""
+    with open(fixture_path, 'w', newline='') as fixture_file:
+        return write_csv(['email', 'password'], islice(login_rows(users_path), limit), fixture_file)
+
+
+use_passwords(DEFAULT_PASSWORDS)
+
+
+# --- k6 fixtures ---
+# product.js logs each VU in once and then searches products by name. Rather
+# than one big login.csv that every VU parses at init and indexes by __VU,
+# export_k6_fixtures deals the logins and product names round-robin into one
+# small file per VU (login/0001.csv, products/0001.csv, ...), optionally per
+# scenario, so a VU opens only its own slice and no two VUs share an account.
+# k6-fixtures.json tells the script how many VUs each scenario has files for.
+K6_MANIFEST = 'k6-fixtures.json'
+K6_DEFAULT_SCENARIO = 'default'
+
+
+def parse_k6_vus(text):
+    """Parses '30' or 'load=30,spike=100' into {scenario: vus}; a bare number is the 'default' scenario."""
+    if text.strip().isdigit():
+        scenarios = {K6_DEFAULT_SCENARIO: int(text)}
+    else:
+        scenarios = {}
+        for item in text.split(','):
+            scenario, _, vus = item.partition('=')
+            scenarios[scenario.strip()] = int(vus)
+    if any(vus < 1 for vus in scenarios.values()):
+        raise ValueError("every scenario needs at least one VU")
+    return scenarios
+
+
+def product_names(products_path):
+    """Yields [name] for every product of a generated products CSV."""
+    with open(products_path, newline='') as products_file:
+        for product in csv.DictReader(products_file):
+            yield [product['name']]
+
+
+def _deal_rows(rows, paths, header, per_file=None):
+    """Writes rows round-robin into paths, each under header; returns the row count of each file."""
+    files = [open(path, 'w', newline='') for path in paths]
+    counts = [0] * len(paths)
+    try:
+        writers = [csv.writer(fixture_file) for fixture_file in files]
+        for writer in writers:
+            writer.writerow(header)
+        limit = per_file * len(paths) if per_file is not None else None
+        for index, row in enumerate(islice(rows, limit)):
+            shard = index % len(writers)
+            writers[shard].writerow(row)
+            counts[shard] += 1
+    finally:
+        for fixture_file in files:
+            fixture_file.close()
+    return counts
+
+
+def export_k6_fixtures(out_dir, scenarios, users_path=None, products_path=None, per_vu=None):
+    """Writes per-VU login and product name files for k6 into out_dir; returns the manifest.
+
+    scenarios maps a scenario name to its VU count. Every VU of every scenario
+    gets its own files, with at most per_vu rows each.
+    """
+    manifest = {'scenarios': {
+        scenario: {'dir': '' if scenario == K6_DEFAULT_SCENARIO else scenario, 'vus': vus}
+        for scenario, vus in scenarios.items()
+    }}
+    shards = [(scenario, vu) for scenario, vus in scenarios.items() for vu in range(1, vus + 1)]
+    fixtures = [('login', users_path, ['email', 'password'], login_rows),
+                ('products', products_path, ['Name'], product_names)]
+    for kind, source, header, read_rows in fixtures:
+        if source is None:
+            continue
+        paths = []
+        for scenario, vu in shards:
+            directory = os.path.join(out_dir, manifest['scenarios'][scenario]['dir'], kind)
+            os.makedirs(directory, exist_ok=True)
+            paths.append(os.path.join(directory, f'{vu:04d}.csv'))
+        counts = iter(_deal_rows(read_rows(source), paths, header, per_vu))
+        for scenario, vus in scenarios.items():
+            # The fewest rows any VU of the scenario got.
+            manifest['scenarios'][scenario][kind] = min(islice(counts, vus))
+    with open(os.path.join(out_dir, K6_MANIFEST), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+# --- Address store ---
+# A user's address is a pure function of (address seed, user id). generate_users
+# and generate_invoices both read it from here, so billing addresses match the
+# user rows, and an invoice only pays for the users it references. Nothing is
+# kept per user apart from a bounded cache of recent lookups.
+ADDRESS_COUNTRIES = ['United States', 'United Kingdom', 'Canada', 'Australia', 'Vietnam', 'Germany']
+ADDRESS_CACHE_SIZE = 65536
+
+
+class AddressStore:
+    """Resolves (address, city, state, country, postcode, phone) for a user id.
+
+    The store draws from the plain Faker of each locale set in fakers (the
+    ones the rest of the run uses), lending it a Random seeded for the user
+    while it does, so no second multi-locale Faker is ever built.
+    """
+
+    def __init__(self, seed, pool_size=0, fakers=_plain_fakers):
+        self._seed = seed
+        self._pool_size = pool_size
+        self._rng = random.Random()
+        self._plain = {tuple(faker.locales): faker for faker in fakers}
+        self._fakers = {}
+        self._randoms = {}
+        self.get = functools.lru_cache(maxsize=ADDRESS_CACHE_SIZE)(self._derive)
+
+    @contextmanager
+    def _faker(self, locales, user_seed):
+        """Yields the Faker for locales with every draw it makes coming from user_seed."""
+        if self._pool_size:
+            faker = self._fakers.get(locales)
+            if faker is None:
+                faker = self._fakers[locales] = PooledFaker(
+                    self._plain[locales], self._pool_size, derive_seed(self._seed, 'pool', *locales), self._rng)
+            yield faker
+            return
+        faker = self._plain[locales]
+        factories = faker.factories
+        randoms = self._randoms.get(locales)
+        if randoms is None:
+            randoms = self._randoms[locales] = [random.Random() for _ in factories]
+        lent = [factory.random for factory in factories]
+        for factory, rng in zip(factories, randoms):
+            rng.seed(user_seed)
+            factory.random = rng
+        try:
+            yield faker
+        finally:
+            for factory, rng in zip(factories, lent):
+                factory.random = rng
+
+    def _derive(self, user_id):
+        rng = self._rng
+        user_seed = derive_seed(self._seed, user_id)
+        rng.seed(user_seed)
+        country = rng.choice(ADDRESS_COUNTRIES)
+
+        if country == 'Canada':
+            with self._faker(('en_CA',), user_seed) as canada:
+                # Generate random Canadian-style postcode
+                letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+                numbers = "0123456789"
+                canadian_postcode = (
+                    rng.choice(letters) +
+                    rng.choice(numbers) +
+                    rng.choice(letters) +
+                    " " +
+                    rng.choice(numbers) +
+                    rng.choice(letters) +
+                    rng.choice(numbers)
+                )
+                return (canada.street_address(), canada.city(), canada.province_abbr(), country,
+                        canadian_postcode, canada.phone_number())
+        if country == 'Vietnam':
+            with self._faker(('vi_VN',), user_seed) as vietnam:
+                # Use predefined wards and districts and a random 5-digit postcode
+                random_ward = rng.choice(vietnamese_wards)
+                random_district = rng.choice(vietnamese_districts)
+                address = f"{rng.randint(1, 300)} {vietnam.street_name()}, {random_ward}, {random_district}"
+                return (address, vietnam.city(), 'NULL', country,
+                        f"{rng.randint(10000, 99999)}", f"84{rng.randint(100000000, 999999999)}")
+
+        with self._faker(GENERAL_LOCALES, user_seed) as general:
+            state = general.state_abbr() if country in ('United States', 'Australia') else 'NULL'
+            return (general.street_address(), general.city(), state, country,
+                    general.postcode(), general.phone_number())
+
+
+address_store = AddressStore(0)
+address_seed = 0
+
+
+def use_address_store(seed):
+    """Starts a fresh address store for seed, pooled if value pools are on."""
+    global address_store, address_seed
+    address_seed = seed
+    address_store = AddressStore(derive_seed(seed, 'address'), value_pool_size)
+
+
+# --- Unique emails ---
+# users.email carries a unique index. The first user with a given
+# first.last@domain gets it as is; any later user with the same address gets
+# their id appended to the local part (first.last4821@domain) instead. Plain
+# local parts are letters only and tagged ones end in digits, so a tagged
+# address can never equal a plain one, and ids are unique, so tagged addresses
+# never equal each other. Only plain addresses need remembering, and an
+# EmailIndex remembers them in a Bloom filter: a false positive only means a
+# user gets a tagged address they did not strictly need.
+#
+# Sharded runs deal the email domains out between the shards, so plain
+# addresses from two different shards always differ in their domain. Rows
+# appended to an existing table cannot know which plain addresses the earlier
+# run handed out, so they all get the tagged form.
+EMAIL_INDEX_ERROR_RATE = 0.01
+EMAIL_DOMAINS = 4096
+
+
+class EmailIndex:
+    """Bloom filter of the plain email addresses handed out so far."""
+
+    def __init__(self, expected, error_rate=EMAIL_INDEX_ERROR_RATE):
+        expected = max(expected, 1)
+        self._bits = max(int(-expected * math.log(error_rate) / math.log(2) ** 2), 64)
+        self._hashes = max(round(self._bits / expected * math.log(2)), 1)
+        self._filter = bytearray((self._bits + 7) // 8)
+
+    def claim(self, address):
+        """Records address and returns True if it was not handed out before."""
+        digest = hashlib.blake2b(address.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        seen = True
+        for k in range(self._hashes):
+            bit = (first + k * step) % self._bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._filter[byte] & mask:
+                seen = False
+                self._filter[byte] |= mask
+        return not seen
+
+
+def email_local_part(name):
+    """Reduces a name to the lower-case ASCII letters it spells."""
+    ascii_name = unicodedata.normalize('NFKD', name).encode('ascii', 'ignore').decode()
+    return re.sub(r'[^a-z]+', '', ascii_name.lower()) or 'user'
+
+
+def unique_email(index, first_name, last_name, domain, user_id):
+    """Returns first.last@domain if index lets it through, else first.last<user_id>@domain.
+
+    With index None every address gets the tagged form.
+    """
+    local = f"{email_local_part(first_name)}.{email_local_part(last_name)}"
+    address = f"{local}@{domain}"
+    if index is not None and index.claim(address):
+        return address
+    return f"{local}{user_id}@{domain}"
+
+
+def generate_users(num_users, session=None):
     """Generates user data."""
-    global user_ids
+    return collect(stream_users(num_users, session=session))
+
+
+def stream_users(num_users, start_id=1, session=None):
+    """Streams user data one row at a time."""
+    session = session or default_session
     headers = [
         'id', 'first_name', 'last_name', 'address', 'city', 'state', 'country',
         'postcode', 'phone', 'dob', 'email', 'password', 'role', 'enabled',
         'failed_login_attempts', 'created_at', 'updated_at'
     ]
-    data = []
-    for i in range(1, num_users + 1):
+    return headers, _iter_users(num_users, start_id, session)
+
+
+def years_before(day, years):
+    """Returns the same calendar day years earlier (Feb 28 for a Feb 29 that does not exist then)."""
+    try:
+        return day.replace(year=day.year - years)
+    except ValueError:
+        return day.replace(year=day.year - years, day=28)
+
+
+def date_of_birth(rng, today, minimum_age=18, maximum_age=90):
+    """Returns a birth date for someone minimum_age to maximum_age years old on today.
+
+    The same range as Faker's date_of_birth(), but measured from the run clock
+    rather than the wall clock, so a fixed --as-of gives the same dates on any
+    day.
+    """
+    latest = years_before(today, minimum_age)
+    earliest = years_before(today, maximum_age + 1) + timedelta(days=1)
+    return date.fromordinal(rng.randint(earliest.toordinal(), latest.toordinal()))
+
+
+def _iter_users(num_users, start_id, session):
+    rng, fake, user_ids = session.random, session.fake, session.ids['users']
+    today = session.clock.date()
+    emails = EmailIndex(num_users) if session.plain_emails else None
+    domains = session.names.email_domains(*session.email_partition)
+    for i in range(start_id, start_id + num_users):
         user_id = i
         user_ids.append(user_id)
         first_name = fake.first_name()
         last_name = fake.last_name()
         
-        # Randomly choose a country for more varied addresses
-        country = random.choice(['United States', 'United Kingdom', 'Canada', 'Australia', 'Vietnam', 'Germany'])
-        
-        address_info = {}
-        if country == 'United States':
-            address_info = {
-                'address': fake.street_address(),
-                'city': fake.city(),
-                'state': fake.state_abbr(),
-                'postcode': fake.postcode(),
-                'phone': fake.phone_number()
-            }
-        elif country == 'United Kingdom':
-            address_info = {
-                'address': fake.street_address(),
-                'city': fake.city(),
-                'state': 'NULL',
-                'postcode': fake.postcode(),
-                'phone': fake.phone_number()
-            }
-        elif country == 'Canada':
-            # Generate random Canadian-style postcode
-            letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-            numbers = "0123456789"
-            canadian_postcode = (
-                random.choice(letters) + 
-                random.choice(numbers) + 
-                random.choice(letters) + 
-                " " + 
-                random.choice(numbers) + 
-                random.choice(letters) + 
-                random.choice(numbers)
-            )
-            address_info = {
-                'address': canada_fake.street_address(),
-                'city': canada_fake.city(),
-                'state': canada_fake.province_abbr(),
-                'postcode': canadian_postcode,
-                'phone': canada_fake.phone_number()
-            }
-        elif country == 'Australia':
-            address_info = {
-                'address': fake.street_address(),
-                'city': fake.city(),
-                'state': fake.state_abbr(),
-                'postcode': fake.postcode(),
-                'phone': fake.phone_number()
-            }
-        elif country == 'Vietnam':
-            # Generate random 5-digit postcode for Vietnam
-            vietnam_postcode = f"{random.randint(10000, 99999)}"
-            # Use predefined wards and districts
-            random_ward = random.choice(vietnamese_wards)
-            random_district = random.choice(vietnamese_districts)
-            address_info = {
-                'address': f"{random.randint(1, 300)} {vietnam_fake.street_name()}, {random_ward}, {random_district}",
-                'city': vietnam_fake.city(), # Still use vietnam_fake for city
-                'state': 'NULL',
-                'postcode': vietnam_postcode,
-                'phone': f"84{random.randint(100000000, 999999999)}"
-            }
-        elif country == 'Germany':
-            address_info = {
-                'address': fake.street_address(),
-                'city': fake.city(),
-                'state': 'NULL',
-                'postcode': fake.postcode(),
-                'phone': fake.phone_number()
-            }
-            
-        dob = fake.date_of_birth(minimum_age=18, maximum_age=90).strftime('%Y-%m-%d')
-        email = f"{first_name.lower()}.{last_name.lower()}@{fake.domain_name()}"
-        password = hashlib.sha256("password123".encode()).hexdigest()
+        address, city, state, country, postcode, phone = session.address_store.get(user_id)
+
+        dob = date_of_birth(rng, today).strftime('%Y-%m-%d')
+        email = unique_email(emails, first_name, last_name, rng.choice(domains), user_id)
+        if len(password_plaintexts) > 1:
+            password = password_digests[rng.choice(password_plaintexts)]
+        else:
+            password = password_digests[password_plaintexts[0]]
         role = 'user'
         enabled = 1
         failed_login_attempts = 0
         created_at = 'NULL'
         updated_at = 'NULL'
 
-        data.append([
-            user_id, first_name, last_name, address_info['address'], address_info['city'], address_info['state'], country,
-            address_info['postcode'], address_info['phone'], dob, email, password, role, enabled,
+        yield [
+            user_id, first_name, last_name, address, city, state, country,
+            postcode, phone, dob, email, password, role, enabled,
             failed_login_attempts, created_at, updated_at
-        ])
-    return headers, data
+        ]
+
+
+# --- Unique names and slugs ---
+# Faker's unique proxy retries against a growing set of seen values and gives
+# up once its vocabulary runs out. A UniqueNamer maps the n-th generated row
+# straight to a name instead: one vocabulary word, then pairs of words, then
+# the pairs again with " 2", " 3", ... appended, always followed by a fixed
+# suffix word. Vocabulary words are single alphabetic tokens with distinct
+# slugs, so every ordinal gets a different slug without remembering any of
+# them, and shards never collide because the name depends only on the id.
+NAME_SOURCES = {
+    # kind: (Faker provider word list supplying the vocabulary, suffix word)
+    'category': ('word_list', 'Category'),
+    'brand': ('last_names', 'Tools'),
+}
+# The Faker provider package each word list lives in.
+VOCABULARY_PROVIDERS = {
+    'word_list': 'faker.providers.lorem',
+    'last_names': 'faker.providers.person',
+    'tlds': 'faker.providers.internet',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def provider_vocabulary(attribute):
+    """Returns every value of a Faker provider list (e.g. 'last_names') across GENERAL_LOCALES, sorted.
+
+    The lists are read from the provider modules themselves, which is much
+    cheaper than building a Faker, let alone sampling them thousands of times.
+    A locale without its own module falls back to the package default, as
+    Faker does.
+    """
+    package_name = VOCABULARY_PROVIDERS[attribute]
+    package = import_module(package_name)
+    values = set()
+    for locale in GENERAL_LOCALES:
+        try:
+            module = import_module(f'{package_name}.{locale}')
+        except ModuleNotFoundError:
+            module = import_module(f"{package_name}.{getattr(package, 'default_locale', 'en_US')}")
+        values.update(getattr(module.Provider, attribute))
+    return sorted(values)
+
+
+def slugify(name):
+    """Lower-cases a name and joins its words with '-'."""
+    return re.sub(r'[\W_]+', '-', name.lower()).strip('-')
+
+
+class UniqueNamer:
+    """Maps an ordinal (0, 1, 2, ...) to a distinct (name, slug) pair in O(1)."""
+
+    def __init__(self, words, suffix, seed, max_words=2):
+        tokens = {}
+        for word in words:
+            if word.isalpha():
+                tokens.setdefault(word.lower(), word.capitalize())
+        rng = random.Random(seed)
+        self._words = sorted(tokens.values())
+        rng.shuffle(self._words)
+        self._suffix = suffix
+        size = len(self._words)
+        self._block_sizes = [size ** count for count in range(1, max_words + 1)]
+        self._capacity = sum(self._block_sizes)
+        # Walking the ordinals with a stride coprime to the capacity visits every
+        # name once, but not in vocabulary order.
+        self._stride = rng.randrange(1, self._capacity)
+        while math.gcd(self._stride, self._capacity) != 1:
+            self._stride += 1
+        self._offset = rng.randrange(self._capacity)
+
+    def name(self, ordinal):
+        repeat, position = divmod(ordinal, self._capacity)
+        position = (position * self._stride + self._offset) % self._capacity
+        for word_count, block_size in enumerate(self._block_sizes, 1):
+            if position < block_size:
+                break
+            position -= block_size
+        parts = []
+        for _ in range(word_count):
+            position, index = divmod(position, len(self._words))
+            parts.append(self._words[index])
+        parts.append(self._suffix)
+        if repeat:
+            parts.append(str(repeat + 1))
+        name = ' '.join(parts)
+        return name, slugify(name)
+
+
+class GeneratedNames:
+    """The category and brand names and the email domain pool derived from one seed."""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self._namers = {}
+        self._domain_pools = {}
+
+    def unique_name(self, kind, ordinal):
+        """Returns the (name, slug) of the ordinal-th generated row of kind ('category' or 'brand')."""
+        namer = self._namers.get(kind)
+        if namer is None:
+            attribute, suffix = NAME_SOURCES[kind]
+            namer = self._namers[kind] = UniqueNamer(provider_vocabulary(attribute), suffix,
+                                                     derive_seed(self.seed, 'names', kind))
+        return namer.name(ordinal)
+
+    def email_domains(self, partition=0, partitions=1):
+        """Returns partition's share of the email domains when they are dealt out to partitions shards."""
+        pool = self._domain_pools.get(partitions)
+        if pool is None:
+            # Shaped like Faker's domain_name(): one or two surnames and a top-level domain.
+            rng = random.Random(derive_seed(self.seed, 'email domains'))
+            words = [email_local_part(name) for name in provider_vocabulary('last_names')]
+            tlds = provider_vocabulary('tlds')
+            domains = {}
+            while len(domains) < max(EMAIL_DOMAINS, partitions):
+                label = '-'.join(rng.sample(words, rng.randint(1, 2)))
+                domains.setdefault(f"{label}.{rng.choice(tlds)}", None)
+            pool = self._domain_pools[partitions] = list(domains)
+        return pool[partition::partitions]
+
+
+names = GeneratedNames(0)
+
+
+def use_names(seed):
+    """Derives generated category and brand names and email domains from seed."""
+    global names
+    names = GeneratedNames(seed)
+
+
+# --- Foreign key sampling ---
+# By default a foreign key picks its target uniformly. FK_SKEW_KINDS make some
+# targets hot instead:
+#   zipf:S      the k-th hottest target has weight 1 / k**S
+#   power:A     weight (1 + k / (n / 100)) ** -A, a hot set of about the top 1%
+#               with a long tail behind it
+#   file:PATH   one 'id,weight' line per target; ids not listed are never picked
+# For zipf and power the hot targets are spread over the id range by a fixed
+# permutation rather than being ids 1, 2, 3, ... The weights go into an alias
+# table once per id domain, after which every draw costs two random numbers.
+# Building one is O(n) but slow in Python (seconds for millions of ids), so
+# generate_sharded builds them once and hands them to its workers.
+SKEWED_FOREIGN_KEYS = {
+    # (table, column): the table whose ids the column references
+    ('invoice', 'user_id'): 'users',
+    ('invoice_item', 'invoice_id'): 'invoice',
+    ('invoice_item', 'product_id'): 'product',
+    ('product_image', 'product_id'): 'product',
+    ('contact_reply', 'user_id'): 'users',
+}
+FK_SKEW_KINDS = ('zipf', 'power', 'file')
+SKEW_TABLE_CACHE_SIZE = 16
+fk_skew = {}
+fk_skew_seed = 0
+_skew_tables = {}
+
+
+class AliasTable:
+    """Draws index i with probability weights[i] / sum(weights) in O(1) (Vose's alias method)."""
+
+    def __init__(self, weights):
+        probability = array('d', weights)
+        total = sum(probability)
+        if not probability or total <= 0:
+            raise ValueError("an alias table needs at least one positive weight")
+        size = len(probability)
+        # Scaled in place, and the work lists are arrays too: a few bytes per
+        # index rather than a list slot and a float or int object each.
+        for index, weight in enumerate(probability):
+            probability[index] = weight * size / total
+        alias = array('I', bytes(4 * size))
+        small = array('I', (index for index, share in enumerate(probability) if share < 1.0))
+        large = array('I', (index for index, share in enumerate(probability) if share >= 1.0))
+        while small and large:
+            less, more = small.pop(), large[-1]
+            alias[less] = more
+            probability[more] -= 1.0 - probability[less]
+            if probability[more] < 1.0:
+                small.append(large.pop())
+        for index in small + large:
+            probability[index] = 1.0
+        self._size = size
+        self._probability = probability
+        self._alias = alias
+
+    def sample(self, rng=random):
+        index = int(rng.random() * self._size)
+        return index if rng.random() < self._probability[index] else self._alias[index]
+
+    def sample_many(self, count, generator):
+        """Draws count indexes at once with a NumPy Generator."""
+        index = generator.integers(0, self._size, count)
+        probability = np.frombuffer(self._probability, dtype=np.float64)
+        alias = np.frombuffer(self._alias, dtype=np.uint32)
+        return np.where(generator.random(count) < probability[index], index, alias[index])
+
+
+def parse_fk_skew(text):
+    """Parses 'invoice_item.product_id=zipf:1.1,invoice.user_id=file:buyers.csv' into {(table, column): (kind, arg)}."""
+    skew = {}
+    for item in filter(None, text.split(',')):
+        key, _, distribution = item.partition('=')
+        table_name, _, column = key.strip().partition('.')
+        kind, _, argument = distribution.partition(':')
+        if (table_name, column) not in SKEWED_FOREIGN_KEYS:
+            raise ValueError(f"unknown foreign key '{key}'; choose from "
+                             + ', '.join('.'.join(fk) for fk in SKEWED_FOREIGN_KEYS))
+        if kind not in FK_SKEW_KINDS:
+            raise ValueError(f"unknown distribution '{kind}'; choose from {', '.join(FK_SKEW_KINDS)}")
+        if kind == 'file':
+            if not os.path.exists(argument):
+                raise ValueError(f"no weights file '{argument}'")
+        elif float(argument) <= 0:
+            raise ValueError(f"{kind} needs a positive exponent")
+        skew[(table_name, column)] = (kind, argument)
+    return skew
+
+
+def use_fk_skew(skew, seed=0):
+    """Sets the {(table, column): (kind, arg)} foreign key distributions; seed picks which ids are hot."""
+    global fk_skew, fk_skew_seed
+    fk_skew = dict(skew)
+    fk_skew_seed = seed
+
+
+def _file_weights(path, size):
+    weights = array('d', bytes(8 * size))
+    with open(path, newline='') as weights_file:
+        for row in csv.reader(weights_file):
+            if len(row) < 2 or not row[0].strip().isdigit():
+                continue
+            target_id = int(row[0])
+            if 1 <= target_id <= size:
+                weights[target_id - 1] = float(row[1])
+    return weights
+
+
+def _skew_table(kind, argument, size, key, seed):
+    """Returns (alias table over ranks, stride, offset) for one foreign key's id domain.
+
+    Rank k is id index (k * stride + offset) % size; file weights have no
+    stride (rank is the index). The last SKEW_TABLE_CACHE_SIZE tables built or
+    handed over by use_skew_tables are kept.
+    """
+    cache_key = (kind, argument, size, key, seed)
+    table = _skew_tables.get(cache_key)
+    if table is None:
+        if len(_skew_tables) >= SKEW_TABLE_CACHE_SIZE:
+            _skew_tables.pop(next(iter(_skew_tables)))
+        table = _skew_tables[cache_key] = _build_skew_table(*cache_key)
+    return table
+
+
+def _build_skew_table(kind, argument, size, key, seed):
+    if kind == 'file':
+        return AliasTable(_file_weights(argument, size)), None, 0
+    exponent = float(argument)
+    if kind == 'zipf':
+        weights = (rank ** -exponent for rank in range(1, size + 1))
+    else:
+        scale = max(size / 100, 1.0)
+        weights = ((1 + rank / scale) ** -exponent for rank in range(size))
+    rng = random.Random(derive_seed(seed, 'skew', *key))
+    stride = rng.randrange(1, size) if size > 1 else 1
+    while math.gcd(stride, size) != 1:
+        stride += 1
+    offset = rng.randrange(size)
+    return AliasTable(weights), stride, offset
+
+
+def skew_tables(table_name, parent_ids):
+    """Returns the skew tables of table_name's foreign keys over parent_ids, building any that are missing."""
+    tables = {}
+    for (table, column), distribution in fk_skew.items():
+        ids = parent_ids.get(SKEWED_FOREIGN_KEYS[(table, column)]) if table == table_name else None
+        if ids:
+            key = (*distribution, len(ids), (table, column), fk_skew_seed)
+            tables[key] = _skew_table(*key)
+    return tables
+
+
+def use_skew_tables(tables):
+    """Adds skew tables built elsewhere (see skew_tables) to the ones _skew_table knows."""
+    _skew_tables.update(tables)
+
+
+def fk_sampler(table_name, column, ids, rng=random):
+    """Returns a function that picks one of ids for table_name.column with rng, skewed if fk_skew says so."""
+    distribution = fk_skew.get((table_name, column))
+    if distribution is None:
+        return lambda: rng.choice(ids)
+    size = len(ids)
+    table, stride, offset = _skew_table(*distribution, size, (table_name, column), fk_skew_seed)
+    if stride is None:
+        return lambda: ids[table.sample(rng)]
+    return lambda: ids[(table.sample(rng) * stride + offset) % size]
+
+
+# --- Category tree ---
+# Categories after the seed ones form a breadth-first forest: category_roots
+# trees, every category with up to category_fan_out children and at most
+# category_depth levels below its root. Once that forest is full the next
+# category starts a new one. A parent is computed from the child's id alone, so
+# it costs O(1), always has a smaller id (no cycles) and is known to every
+# shard without seeing the earlier ones.
+BASE_CATEGORIES = [
+    # (name, slug, parent_id)
+    ("Hand Tools", "hand-tools", 'NULL'),
+    ("Power Tools", "power-tools", 'NULL'),
+    ("Hammer", "hammer", 1),
+    ("Hand Saw", "hand-saw", 1),
+    ("Wrench", "wrench", 1),
+    ("Screwdriver", "screwdriver", 1),
+    ("Pliers", "pliers", 1),
+    ("Grinder", "grinder", 2),
+    ("Sander", "sander", 2),
+    ("Saw", "saw", 2),
+    ("Drill", "drill", 2),
+    ("Other", "other", 'NULL'),
+]
+DEFAULT_CATEGORY_TREE = (10, 5, 3)
 
 
-def generate_categories(num_categories):
+def use_category_tree(roots, fan_out, depth):
+    """Sets the shape of the generated category forest."""
+    global category_tree, _category_forest_size
+    if roots < 1 or fan_out < 1 or depth < 0:
+        raise ValueError("category trees need at least one root, a fan-out of at least 1 and depth >= 0")
+    category_tree = (roots, fan_out, depth)
+    # Categories in one full forest: roots * (1 + fan_out + ... + fan_out ** depth).
+    _category_forest_size = roots * sum(fan_out ** level for level in range(depth + 1))
+
+
+def category_parent(category_id):
+    """Returns the parent id of a category, or 'NULL' for a root."""
+    if category_id <= len(BASE_CATEGORIES):
+        return BASE_CATEGORIES[category_id - 1][2]
+    roots, fan_out, _ = category_tree
+    forest, position = divmod(category_id - len(BASE_CATEGORIES) - 1, _category_forest_size)
+    if position < roots:
+        return 'NULL'
+    return len(BASE_CATEGORIES) + forest * _category_forest_size + (position - roots) // fan_out + 1
+
+
+use_category_tree(*DEFAULT_CATEGORY_TREE)
+
+
+def generate_categories(num_categories, session=None):
     """Generates category data."""
-    global category_ids
+    return collect(stream_categories(num_categories, session=session))
+
+
+def stream_categories(num_categories, start_id=1, session=None):
+    """Streams category data one row at a time."""
+    session = session or default_session
     headers = [
         'id', 'parent_id', 'name', 'slug', 'created_at', 'updated_at'
     ]
-    data = []
-    
-    base_categories_and_slugs = [
-        ("Hand Tools", "hand-tools"), 
-        ("Power Tools", "power-tools"), 
-        ("Hammer", "hammer"),
-        ("Hand Saw", "hand-saw"),
-        ("Wrench", "wrench"),
-        ("Screwdriver", "screwdriver"),
-        ("Pliers", "pliers"),
-        ("Grinder", "grinder"),
-        ("Sander", "sander"),
-        ("Saw", "saw"),
-        ("Drill", "drill"),
-        ("Other", "other")
-    ]
-    
-    for i in range(1, num_categories + 1):
+    return headers, _iter_categories(num_categories, start_id, session)
+
+
+def _iter_categories(num_categories, start_id, session):
+    category_ids = session.ids['category']
+    for i in range(start_id, start_id + num_categories):
         category_id = i
         category_ids.append(category_id)
         
-        if i <= len(base_categories_and_slugs):
-            name, slug = base_categories_and_slugs[i-1]
+        if i <= len(BASE_CATEGORIES):
+            name, slug, _ = BASE_CATEGORIES[i-1]
         else:
-            name = fake.unique.word().capitalize() + " Category"
-            slug = name.lower().replace(' ', '-')
-        
-        parent_id = 'NULL'
-        if name in ["Hammer", "Hand Saw", "Wrench", "Screwdriver", "Pliers"] and category_ids and 1 in category_ids:
-            parent_id = 1
-        elif name in ["Grinder", "Sander", "Saw", "Drill"] and category_ids and 2 in category_ids:
-            parent_id = 2
-        elif category_ids and random.random() < 0.2 and len(category_ids) > 1:
-            parent_id = random.choice([cid for cid in category_ids if cid != category_id])
+            name, slug = session.names.unique_name('category', i - len(BASE_CATEGORIES) - 1)
         
+        parent_id = category_parent(category_id)
         created_at = 'NULL'
         updated_at = 'NULL'
 
-        data.append([
+        yield [
             category_id, parent_id, name, slug, created_at, updated_at
-        ])
-    return headers, data
+        ]
 
-def generate_brands(num_brands):
+def generate_brands(num_brands, session=None):
     """Generates brand data."""
-    global brand_ids
+    return collect(stream_brands(num_brands, session=session))
+
+
+def stream_brands(num_brands, start_id=1, session=None):
+    """Streams brand data one row at a time."""
+    session = session or default_session
     headers = [
         'id', 'name', 'slug', 'created_at', 'updated_at'
     ]
-    data = []
-    
+    return headers, _iter_brands(num_brands, start_id, session)
+
+
+def _iter_brands(num_brands, start_id, session):
+    brand_ids = session.ids['brand']
     base_brands = ["Brand name 1", "Brand name 2", "ToolMaster", "PowerCraft", "DIYPro"]
     
-    for i in range(1, num_brands + 1):
+    for i in range(start_id, start_id + num_brands):
         brand_id = i
         brand_ids.append(brand_id)
         
         if i <= len(base_brands):
             name = base_brands[i-1]
+            slug = slugify(name)
         else:
-            name = fake.unique.company() + " Tools"
-        
-        slug = name.lower().replace(' ', '-')
+            name, slug = session.names.unique_name('brand', i - len(base_brands) - 1)
         created_at = 'NULL'
         updated_at = 'NULL'
 
-        data.append([
+        yield [
             brand_id, name, slug, created_at, updated_at
-        ])
-    return headers, data
+        ]
 
 
-def generate_products(num_products):
+def generate_products(num_products, session=None):
     """Generates product data."""
-    global product_ids
-    if not category_ids:
-        print("Please generate categories first to create products.")
+    return collect(stream_products(num_products, session=session))
+
+
+def stream_products(num_products, start_id=1, session=None):
+    """Streams product data one row at a time."""
+    session = session or default_session
+    if not session.ids['category']:
+        print("Please generate categories first to create products.", file=sys.stderr)
         return [], []
         
     headers = [
@@ -230,52 +1190,71 @@ def generate_products(num_products):
         'quantity', 'status', 'created_at', 'updated_at'
     ]
     
-    if brand_ids:
+    with_brand = bool(session.ids['brand'])
+    if with_brand:
         headers.insert(2, 'brand_id')
     
-    data = []
-    for i in range(1, num_products + 1):
+    iter_rows = _iter_products_batched if vectorized else _iter_products
+    return headers, iter_rows(num_products, start_id, with_brand, session)
+
+
+def _iter_products(num_products, start_id, with_brand, session):
+    rng, fake, ids = session.random, session.fake, session.ids
+    product_ids, category_ids, brand_ids = ids['product'], ids['category'], ids['brand']
+    now = format_timestamp(clock_seconds(session.clock))
+    for i in range(start_id, start_id + num_products):
         product_id = i
         product_ids.append(product_id)
-        category_id = random.choice(category_ids)
+        category_id = rng.choice(category_ids)
         name = fake.catch_phrase() + " " + fake.word().capitalize()
         description = fake.paragraph(nb_sentences=3)
-        price = round(random.uniform(5.00, 1000.00), 2)
-        sku = f"PROD-{product_id:04d}-{random.randint(100,999)}"
-        quantity = random.randint(0, 500)
+        price = round(rng.uniform(5.00, 1000.00), 2)
+        sku = f"PROD-{product_id:04d}-{rng.randint(100,999)}"
+        quantity = rng.randint(0, 500)
         status = 1
-        created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        created_at = now
+        updated_at = now
 
         row = [
             product_id, category_id, name, description, price, sku,
             quantity, status, created_at, updated_at
         ]
         
-        if brand_ids:
-            brand_id = random.choice(brand_ids) if random.random() < 0.7 else 'NULL'
+        if with_brand:
+            brand_id = rng.choice(brand_ids) if rng.random() < 0.7 else 'NULL'
             row.insert(2, brand_id)
             
-        data.append(row)
-    return headers, data
+        yield row
 
 
-def generate_product_images(num_product_images):
+def generate_product_images(num_product_images, session=None):
     """Generates product image data."""
-    if not product_ids:
-        print("Please generate products first to create product images.")
+    return collect(stream_product_images(num_product_images, session=session))
+
+
+def stream_product_images(num_product_images, start_id=1, session=None):
+    """Streams product image data one row at a time."""
+    session = session or default_session
+    if not session.ids['product']:
+        print("Please generate products first to create product images.", file=sys.stderr)
         return [], []
 
     headers = [
         'id', 'product_id', 'image_url', 'sort_order', 'is_thumbnail', 'created_at', 'updated_at'
     ]
-    data = []
-    
-    product_sort_order = {}
+    iter_rows = _iter_product_images_batched if vectorized else _iter_product_images
+    return headers, iter_rows(num_product_images, start_id, session)
+
 
-    for i in range(1, num_product_images + 1):
+def _iter_product_images(num_product_images, start_id, session):
+    rng = session.random
+    product_sort_order = dict(session.image_sort_orders)
+    now = format_timestamp(clock_seconds(session.clock))
+    pick_product = fk_sampler('product_image', 'product_id', session.ids['product'], rng)
+
+    for i in range(start_id, start_id + num_product_images):
         product_image_id = i
-        product_id = random.choice(product_ids)
+        product_id = pick_product()
         
         if product_id not in product_sort_order:
             product_sort_order[product_id] = 0
@@ -284,22 +1263,80 @@ def generate_product_images(num_product_images):
         image_url = f"https://example.com/images/products/{product_id}_{product_sort_order[product_id]}.jpg"
         sort_order = product_sort_order[product_id]
         
-        is_thumbnail = 1 if sort_order == 1 else random.choice([0, 1])
+        is_thumbnail = 1 if sort_order == 1 else rng.choice([0, 1])
         
-        created_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        created_at = now
+        updated_at = now
 
-        data.append([
+        yield [
             product_image_id, product_id, image_url, sort_order, is_thumbnail, created_at, updated_at
-        ])
-    return headers, data
+        ]
 
 
-def generate_invoices(num_invoices):
+# sort_order numbers each product's images 1, 2, 3, ... over the whole table,
+# so product images are generated as one ordered stream (see ORDERED_TABLES).
+# A session's image_sort_orders holds the last sort_order of each product
+# already written, for --append to continue from. A product image file gets a
+# SORT_ORDERS_SUFFIX sidecar with them (indexed by product id, after the last
+# row id and the size of the file they belong to), so that appending reads
+# the new rows only; a sidecar that does not match the file is ignored and
+# the file is scanned instead.
+_IMAGE_URL = re.compile(rb'/images/products/(\d+)_(\d+)\.jpg')
+SORT_ORDERS_SUFFIX = '.sort-orders'
+
+
+def image_sort_orders_in(path):
+    """Returns {product_id: last sort_order} of the product images in a table file of any text format."""
+    orders = {}
+    with open(path, 'rb') as table_file:
+        for line in table_file:
+            for match in _IMAGE_URL.finditer(line):
+                product_id, sort_order = int(match[1]), int(match[2])
+                if sort_order > orders.get(product_id, 0):
+                    orders[product_id] = sort_order
+    return orders
+
+
+def load_image_sort_orders(path, last_id):
+    """Returns image_sort_orders_in(path), from its sidecar when that was written for the file as it is."""
+    try:
+        with open(path + SORT_ORDERS_SUFFIX, 'rb') as sidecar:
+            written_for = array('Q')
+            written_for.fromfile(sidecar, 2)
+            orders = array('I')
+            orders.frombytes(sidecar.read())
+    except (OSError, EOFError, ValueError):
+        return image_sort_orders_in(path)
+    if list(written_for) != [last_id, os.path.getsize(path)]:
+        return image_sort_orders_in(path)
+    return {product_id: order for product_id, order in enumerate(orders) if order}
+
+
+def save_image_sort_orders(path, last_id, orders):
+    """Writes the sidecar of the product image file at path, whose last row id is last_id."""
+    dense = array('I', bytes(4 * (max(orders, default=0) + 1)))
+    for product_id, order in orders.items():
+        dense[product_id] = order
+    with open(path + SORT_ORDERS_SUFFIX + '.tmp', 'wb') as sidecar:
+        array('Q', [last_id, os.path.getsize(path)]).tofile(sidecar)
+        dense.tofile(sidecar)
+    os.replace(path + SORT_ORDERS_SUFFIX + '.tmp', path + SORT_ORDERS_SUFFIX)
+
+
+INVOICE_STATUSES = ['AWAITING_FULFILLMENT', 'ON HOLD', 'COMPLETED', 'CANCELLED']
+PAYMENT_METHODS = ['Cash On Delivery', 'Bank Transfer', 'Credit Card']
+
+
+def generate_invoices(num_invoices, session=None):
     """Generates invoice data."""
-    global invoice_ids
-    if not user_ids:
-        print("Please generate users first to create invoices.")
+    return collect(stream_invoices(num_invoices, session=session))
+
+
+def stream_invoices(num_invoices, start_id=1, session=None):
+    """Streams invoice data one row at a time."""
+    session = session or default_session
+    if not session.ids['users']:
+        print("Please generate users first to create invoices.", file=sys.stderr)
         return [], []
 
     headers = [
@@ -308,140 +1345,140 @@ def generate_invoices(num_invoices):
         'payment_method', 'payment_account_name', 'payment_account_number',
         'status', 'status_message', 'created_at', 'updated_at'
     ]
-    data = []
-    
-    user_address_map = {}
-    for uid in user_ids:
-        country_for_user = random.choice(['United States', 'United Kingdom', 'Canada', 'Australia', 'Vietnam', 'Germany'])
-        
-        user_address_info = {}
-        if country_for_user == 'United States':
-            user_address_info = {
-                'address': fake.street_address(), 'city': fake.city(), 'state': fake.state_abbr(),
-                'country': country_for_user, 'postcode': fake.postcode()
-            }
-        elif country_for_user == 'United Kingdom':
-            user_address_info = {
-                'address': fake.street_address(), 'city': fake.city(), 'state': 'NULL',
-                'country': country_for_user, 'postcode': fake.postcode()
-            }
-        elif country_for_user == 'Canada':
-            letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-            numbers = "0123456789"
-            canadian_postcode = (
-                random.choice(letters) + 
-                random.choice(numbers) + 
-                random.choice(letters) + 
-                " " + 
-                random.choice(numbers) + 
-                random.choice(letters) + 
-                random.choice(numbers)
-            )
-            user_address_info = {
-                'address': canada_fake.street_address(), 'city': canada_fake.city(), 'state': canada_fake.province_abbr(),
-                'country': country_for_user, 'postcode': canadian_postcode
-            }
-        elif country_for_user == 'Australia':
-            user_address_info = {
-                'address': fake.street_address(), 'city': fake.city(), 'state': fake.state_abbr(),
-                'country': country_for_user, 'postcode': fake.postcode()
-            }
-        elif country_for_user == 'Vietnam':
-            vietnam_postcode = f"{random.randint(10000, 99999)}"
-            random_ward = random.choice(vietnamese_wards)
-            random_district = random.choice(vietnamese_districts)
-            user_address_info = {
-                'address': f"{random.randint(1, 300)} {vietnam_fake.street_name()}, {random_ward}, {random_district}",
-                'city': vietnam_fake.city(), 'state': 'NULL',
-                'country': country_for_user, 'postcode': vietnam_postcode
-            }
-        elif country_for_user == 'Germany':
-            user_address_info = {
-                'address': fake.street_address(), 'city': fake.city(), 'state': 'NULL',
-                'country': country_for_user, 'postcode': fake.postcode()
-            }
-        
-        user_address_map[uid] = user_address_info
+    iter_rows = _iter_invoices_batched if vectorized else _iter_invoices
+    return headers, iter_rows(num_invoices, start_id, session)
 
 
-    for i in range(1, num_invoices + 1):
+def _iter_invoices(num_invoices, start_id, session):
+    rng, fake, invoice_ids = session.random, session.fake, session.ids['invoice']
+    invoice_dates = timestamp_column(invoice_date_distribution, clock_seconds(session.clock), rng)
+    pick_user = fk_sampler('invoice', 'user_id', session.ids['users'], rng)
+    for i in range(start_id, start_id + num_invoices):
         invoice_id = i
         invoice_ids.append(invoice_id)
-        user_id = random.choice(user_ids)
+        user_id = pick_user()
         
-        invoice_date_dt = datetime.now() - timedelta(days=random.randint(1, 365))
-        invoice_date = invoice_date_dt.strftime('%Y-%m-%d %H:%M:%S')
+        invoice_date = format_timestamp(next(invoice_dates))
         
-        invoice_number = f"INV-{invoice_date_dt.strftime('%Y%m%d')}-{random.randint(1000000, 9999999)}"
+        invoice_number = f"INV-{invoice_date[:10].replace('-', '')}-{rng.randint(1000000, 9999999)}"
         
-        billing_info = user_address_map.get(user_id, {
-            'address': fake.street_address(), 'city': fake.city(), 'state': 'NULL',
-            'country': random.choice(['United States', 'The Netherlands', 'Belgium']), 'postcode': fake.postcode()
-        })
+        billing_address, billing_city, billing_state, billing_country, billing_postcode, _ = \
+            session.address_store.get(user_id)
 
-        payment_method = random.choice(['Cash On Delivery', 'Bank Transfer', 'Credit Card'])
+        payment_method = rng.choice(PAYMENT_METHODS)
         payment_account_name = fake.name() if payment_method == 'Bank Transfer' else 'Tester'
         payment_account_number = fake.bban() if payment_method == 'Bank Transfer' else '09076540ABC'
         
-        status = random.choice(['AWAITING_FULFILLMENT', 'ON HOLD', 'COMPLETED', 'CANCELLED'])
+        status = rng.choice(INVOICE_STATUSES)
         status_message = 'NULL'
 
         created_at = invoice_date
         updated_at = 'NULL'
 
-        data.append([
-            invoice_id, user_id, invoice_date, invoice_number, billing_info['address'],
-            billing_info['city'], billing_info['state'], billing_info['country'], billing_info['postcode'],
+        yield [
+            invoice_id, user_id, invoice_date, invoice_number, billing_address,
+            billing_city, billing_state, billing_country, billing_postcode,
             payment_method, payment_account_name, payment_account_number,
             status, status_message, created_at, updated_at
-        ])
-    return headers, data
+        ]
 
 
-def generate_invoice_items(num_invoice_items):
-    """Generates invoice item data."""
-    if not invoice_ids:
-        print("Please generate invoices first to create invoice items.")
-        return [], []
-    if not product_ids:
-        print("Please generate products first to create invoice items.")
-        return [], []
+class ProductPrices:
+    """The unit price invoice items charge for each product id.
 
-    headers = [
-        'id', 'invoice_id', 'product_id', 'unit_price', 'quantity',
-        'created_at', 'updated_at'
-    ]
-    data = []
-    
-    product_price_map = {pid: round(random.uniform(5.00, 500.00), 2) for pid in product_ids}
+    Prices are drawn in id order from one generator seeded by seed alone, so a
+    product has the same price in every shard, in both generation modes and
+    after more products are appended.
+    """
 
-    for i in range(1, num_invoice_items + 1):
-        invoice_item_id = i
-        invoice_id = random.choice(invoice_ids)
-        product_id = random.choice(product_ids)
-        quantity = random.randint(1, 5)
-        unit_price = product_price_map.get(product_id, 0.00)
-        
-        created_at = (datetime.now() - timedelta(minutes=random.randint(1, 60))).strftime('%Y-%m-%d %H:%M:%S')
+    def __init__(self, seed):
+        self._random = random.Random(seed)
+        self._prices = array('d')
+
+    def table(self, ids):
+        """Returns an array whose [product_id - 1] is the price of every product in ids."""
+        count = ids[-1] if len(ids) else 0
+        uniform = self._random.uniform
+        self._prices.extend(round(uniform(5.00, 500.00), 2) for _ in range(count - len(self._prices)))
+        return self._prices
+
+
+product_prices = ProductPrices(0)
+price_seed = 0
+
+
+def use_product_prices(seed):
+    """Derives the unit prices of invoice items from seed."""
+    global product_prices, price_seed
+    price_seed = seed
+    product_prices = ProductPrices(derive_seed(seed, 'product prices'))
+
+
+def generate_invoice_items(num_invoice_items, session=None):
+    """Generates invoice item data."""
+    return collect(stream_invoice_items(num_invoice_items, session=session))
+
+
+def stream_invoice_items(num_invoice_items, start_id=1, session=None):
+    """Streams invoice item data one row at a time."""
+    session = session or default_session
+    if not session.ids['invoice']:
+        print("Please generate invoices first to create invoice items.", file=sys.stderr)
+        return [], []
+    if not session.ids['product']:
+        print("Please generate products first to create invoice items.", file=sys.stderr)
+        return [], []
+
+    headers = [
+        'id', 'invoice_id', 'product_id', 'unit_price', 'quantity',
+        'created_at', 'updated_at'
+    ]
+    iter_rows = _iter_invoice_items_batched if vectorized else _iter_invoice_items
+    return headers, iter_rows(num_invoice_items, start_id, session)
+
+
+def _iter_invoice_items(num_invoice_items, start_id, session):
+    rng, product_ids = session.random, session.ids['product']
+    prices = session.product_prices.table(product_ids)
+    item_times = timestamp_column('minutes', clock_seconds(session.clock), rng)
+    pick_invoice = fk_sampler('invoice_item', 'invoice_id', session.ids['invoice'], rng)
+    pick_product = fk_sampler('invoice_item', 'product_id', product_ids, rng)
+
+    for i in range(start_id, start_id + num_invoice_items):
+        invoice_item_id = i
+        invoice_id = pick_invoice()
+        product_id = pick_product()
+        quantity = rng.randint(1, 5)
+        unit_price = prices[product_id - 1]
+        
+        created_at = format_timestamp(next(item_times))
         updated_at = 'NULL'
 
-        data.append([
+        yield [
             invoice_item_id, invoice_id, product_id, unit_price, quantity,
             created_at, updated_at
-        ])
-    return headers, data
+        ]
 
-def generate_contact_replies(num_replies):
+def generate_contact_replies(num_replies, session=None):
     """Generates contact reply data."""
-    if not user_ids:
-        print("Please generate users first to create contact replies.")
+    return collect(stream_contact_replies(num_replies, session=session))
+
+
+def stream_contact_replies(num_replies, start_id=1, session=None):
+    """Streams contact reply data one row at a time."""
+    session = session or default_session
+    if not session.ids['users']:
+        print("Please generate users first to create contact replies.", file=sys.stderr)
         return [], []
 
     headers = [
         'id', 'contact_id', 'user_id', 'reply_message', 'replied_at', 'created_at', 'updated_at'
     ]
-    data = []
+    return headers, _iter_contact_replies(num_replies, start_id, session)
+
 
+def _iter_contact_replies(num_replies, start_id, session):
+    rng = session.random
     # Danh sách 5 phản hồi mặc định
     default_replies = [
         "Cảm ơn bạn đã liên hệ! Chúng tôi đã nhận được yêu cầu của bạn và sẽ phản hồi sớm nhất.",
@@ -452,84 +1489,1703 @@ def generate_contact_replies(num_replies):
     ]
 
     dummy_contact_ids = list(range(1, 101)) # Giả định có 100 contact_id
+    now = format_timestamp(clock_seconds(session.clock))
+    pick_user = fk_sampler('contact_reply', 'user_id', session.ids['users'], rng)
 
-    for i in range(1, num_replies + 1):
+    for i in range(start_id, start_id + num_replies):
         reply_id = i
-        contact_id = random.choice(dummy_contact_ids)
-        user_id = random.choice(user_ids)
+        contact_id = rng.choice(dummy_contact_ids)
+        user_id = pick_user()
         
         # Chọn ngẫu nhiên một phản hồi từ danh sách mặc định
-        reply_message = random.choice(default_replies)
+        reply_message = rng.choice(default_replies)
         
-        replied_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        replied_at = now
         created_at = replied_at
         updated_at = 'NULL'
 
-        data.append([
+        yield [
             reply_id, contact_id, user_id, reply_message, replied_at, created_at, updated_at
-        ])
-    return headers, data
+        ]
+
+
+# --- Vectorized batch mode ---
+# With --vectorized the numeric and templated columns of products, product
+# images, invoices and invoice items are drawn VECTOR_BATCH_SIZE rows at a time
+# from a NumPy Generator and formatted in bulk; only the Faker columns and the
+# address lookups stay per row. Each stream seeds its Generator from the
+# session's random state, so output is still reproducible per seed (but differs
+# from the row-at-a-time mode).
+VECTOR_BATCH_SIZE = 65536
+vectorized = False
+
+
+def use_vectorized(enabled):
+    """Turns the NumPy batch mode on or off; raises RuntimeError if NumPy is missing."""
+    global vectorized, np
+    if enabled and np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("--vectorized needs the numpy package (pip install numpy)") from None
+        np = numpy
+    vectorized = enabled
+
+
+def _numpy_generator(session):
+    return np.random.default_rng(session.random.getrandbits(64))
+
+
+def _batches(start_id, count):
+    """Yields the id range of every batch of count rows starting at start_id."""
+    for batch_start in range(start_id, start_id + count, VECTOR_BATCH_SIZE):
+        yield range(batch_start, min(batch_start + VECTOR_BATCH_SIZE, start_id + count))
+
+
+def fk_indexes(table_name, column, ids, count, generator):
+    """Draws count indexes into ids for table_name.column at once, skewed if fk_skew says so."""
+    size = len(ids)
+    distribution = fk_skew.get((table_name, column))
+    if distribution is None:
+        return generator.integers(0, size, count)
+    table, stride, offset = _skew_table(*distribution, size, (table_name, column), fk_skew_seed)
+    ranks = table.sample_many(count, generator).astype(np.int64)
+    return ranks if stride is None else (ranks * stride + offset) % size
+
+
+def timestamp_batch(distribution, now, count, generator):
+    """Draws count timestamps (seconds since 1970-01-01) before now at once; see TIMESTAMP_DISTRIBUTIONS."""
+    if distribution == 'days':
+        return now - np.asarray(DAYS_BACK)[generator.integers(0, len(DAYS_BACK), count)] * DAY
+    if distribution == 'minutes':
+        return now - np.asarray(MINUTE_OFFSETS)[generator.integers(0, len(MINUTE_OFFSETS), count)]
+    today = now // DAY
+    cum_weights = np.array(_day_cum_weights(today, distribution == 'seasonal'))
+    draws = generator.random(count) * cum_weights[-1]
+    days = np.asarray(DAYS_BACK)[np.searchsorted(cum_weights, draws, side='right')]
+    hour_weights = np.array(_BUSINESS_HOUR_CUM_WEIGHTS)
+    draws = generator.random(count) * hour_weights[-1]
+    hours = np.searchsorted(hour_weights, draws, side='right')
+    return (today - days) * DAY + hours * 3600 + generator.integers(0, 3600, count)
+
+
+def format_timestamps(seconds):
+    """Formats a NumPy array of seconds since 1970-01-01 as YYYY-MM-DD HH:MM:SS strings."""
+    return [text.replace('T', ' ') for text in np.datetime_as_string(seconds.astype('datetime64[s]')).tolist()]
+
+
+def _iter_products_batched(num_products, start_id, with_brand, session):
+    fake, ids = session.fake, session.ids
+    product_ids, category_ids, brand_ids = ids['product'], ids['category'], ids['brand']
+    generator = _numpy_generator(session)
+    now = format_timestamp(clock_seconds(session.clock))
+    for batch in _batches(start_id, num_products):
+        count = len(batch)
+        product_ids.extend(batch)
+        categories = category_ids.take(generator.integers(0, len(category_ids), count)).tolist()
+        prices = np.round(generator.uniform(5.00, 1000.00, count), 2).tolist()
+        skus = [f"PROD-{product_id:04d}-{suffix}"
+                for product_id, suffix in zip(batch, generator.integers(100, 1000, count).tolist())]
+        quantities = generator.integers(0, 501, count).tolist()
+        if with_brand:
+            brands = brand_ids.take(generator.integers(0, len(brand_ids), count))
+            brands = np.where(generator.random(count) < 0.7, brands, 0).tolist()
+        for index, product_id in enumerate(batch):
+            name = fake.catch_phrase() + " " + fake.word().capitalize()
+            description = fake.paragraph(nb_sentences=3)
+            row = [
+                product_id, categories[index], name, description, prices[index], skus[index],
+                quantities[index], 1, now, now
+            ]
+            if with_brand:
+                row.insert(2, brands[index] or 'NULL')
+            yield row
+
+
+def _iter_product_images_batched(num_product_images, start_id, session):
+    product_ids = session.ids['product']
+    generator = _numpy_generator(session)
+    now = format_timestamp(clock_seconds(session.clock))
+    product_sort_order = dict(session.image_sort_orders)
+    for batch in _batches(start_id, num_product_images):
+        count = len(batch)
+        products = product_ids.take(fk_indexes('product_image', 'product_id', product_ids, count, generator))
+        # sort_order numbers each product's images 1, 2, 3, ... in id order: count
+        # the earlier rows of the same product within the batch and add the images
+        # it got in earlier batches.
+        order = np.argsort(products, kind='stable')
+        grouped = products[order]
+        starts = np.flatnonzero(np.r_[True, grouped[1:] != grouped[:-1]])
+        sizes = np.diff(np.r_[starts, count])
+        ranks = np.arange(count) - np.repeat(starts, sizes) + 1
+        firsts = grouped[starts].tolist()
+        ranks += np.repeat([product_sort_order.get(product, 0) for product in firsts], sizes)
+        for product, size, rank in zip(firsts, sizes.tolist(), ranks[starts + sizes - 1].tolist()):
+            product_sort_order[product] = rank
+        sort_orders = np.empty(count, dtype=np.int64)
+        sort_orders[order] = ranks
+        thumbnails = np.where(sort_orders == 1, 1, generator.integers(0, 2, count)).tolist()
+        products = products.tolist()
+        sort_orders = sort_orders.tolist()
+        for index, product_image_id in enumerate(batch):
+            product_id, sort_order = products[index], sort_orders[index]
+            image_url = f"https://example.com/images/products/{product_id}_{sort_order}.jpg"
+            yield [product_image_id, product_id, image_url, sort_order, thumbnails[index], now, now]
+
+
+def _iter_invoices_batched(num_invoices, start_id, session):
+    fake, user_ids, invoice_ids = session.fake, session.ids['users'], session.ids['invoice']
+    generator = _numpy_generator(session)
+    now = clock_seconds(session.clock)
+    for batch in _batches(start_id, num_invoices):
+        count = len(batch)
+        invoice_ids.extend(batch)
+        users = user_ids.take(fk_indexes('invoice', 'user_id', user_ids, count, generator)).tolist()
+        dates = format_timestamps(timestamp_batch(invoice_date_distribution, now, count, generator))
+        numbers = [f"INV-{date[:4]}{date[5:7]}{date[8:10]}-{serial}"
+                   for date, serial in zip(dates, generator.integers(1000000, 10000000, count).tolist())]
+        methods = generator.integers(0, len(PAYMENT_METHODS), count).tolist()
+        statuses = generator.integers(0, len(INVOICE_STATUSES), count).tolist()
+        for index, invoice_id in enumerate(batch):
+            user_id = users[index]
+            billing_address, billing_city, billing_state, billing_country, billing_postcode, _ = \
+                session.address_store.get(user_id)
+            payment_method = PAYMENT_METHODS[methods[index]]
+            if payment_method == 'Bank Transfer':
+                payment_account_name, payment_account_number = fake.name(), fake.bban()
+            else:
+                payment_account_name, payment_account_number = 'Tester', '09076540ABC'
+            yield [
+                invoice_id, user_id, dates[index], numbers[index], billing_address,
+                billing_city, billing_state, billing_country, billing_postcode,
+                payment_method, payment_account_name, payment_account_number,
+                INVOICE_STATUSES[statuses[index]], 'NULL', dates[index], 'NULL'
+            ]
+
+
+def _iter_invoice_items_batched(num_invoice_items, start_id, session):
+    invoice_ids, product_ids = session.ids['invoice'], session.ids['product']
+    generator = _numpy_generator(session)
+    prices = np.frombuffer(session.product_prices.table(product_ids), dtype=np.float64)
+    now = clock_seconds(session.clock)
+    for batch in _batches(start_id, num_invoice_items):
+        count = len(batch)
+        invoices = invoice_ids.take(fk_indexes('invoice_item', 'invoice_id', invoice_ids, count, generator))
+        products = product_ids.take(fk_indexes('invoice_item', 'product_id', product_ids, count, generator))
+        columns = zip(
+            batch, invoices.tolist(), products.tolist(),
+            prices[products - 1].tolist(), generator.integers(1, 6, count).tolist(),
+            format_timestamps(timestamp_batch('minutes', now, count, generator)),
+        )
+        for invoice_item_id, invoice_id, product_id, unit_price, quantity, created_at in columns:
+            yield [invoice_item_id, invoice_id, product_id, unit_price, quantity, created_at, 'NULL']
+
+
+# --- Table registry ---
+TABLE_STREAMS = {
+    'users': stream_users,
+    'category': stream_categories,
+    'brand': stream_brands,
+    'product': stream_products,
+    'product_image': stream_product_images,
+    'invoice': stream_invoices,
+    'invoice_item': stream_invoice_items,
+    'contact_reply': stream_contact_replies,
+}
+
+# The module-level id registry each referenced table fills while it is generated.
+TABLE_ID_LISTS = {
+    'users': user_ids,
+    'category': category_ids,
+    'brand': brand_ids,
+    'product': product_ids,
+    'invoice': invoice_ids,
+}
+
+
+# --- Generator sessions ---
+class GeneratorSession:
+    """Owns the random state, Faker instances, names and id registries of one generation run.
+
+    Everything a session draws from is its own, so a test harness can create
+    one per run or per thread and generate in-process as often as it likes:
+
+        with GeneratorSession(seed=1) as session:
+            session.generate('users', 100)
+            headers, rows = session.generate('invoice', 500)
+
+    Run-wide settings (value pool size, passwords, category tree, invoice date
+    and foreign key distributions, --vectorized) are still read from the
+    module, so every session sees a change to them, even mid-run. The module
+    also caches the provider vocabularies and skew tables, which are pure
+    functions of their arguments.
+    """
+
+    # Per-shard state of sharded runs; a session generates whole tables.
+    plain_emails = True
+    email_partition = (0, 1)
+    image_sort_orders = {}
+
+    def __init__(self, seed=None, clock=None, pool_size=None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.random = random.Random(self.seed)
+        self.clock = clock or datetime.now().replace(microsecond=0)
+        pool_size = value_pool_size if pool_size is None else pool_size
+        fakers = []
+        plain = [LazyFaker(faker.locales, derive_seed(self.seed, 'faker', index))
+                 for index, faker in enumerate(_plain_fakers)]
+        for index, faker in enumerate(plain):
+            if pool_size:
+                faker = PooledFaker(faker, pool_size, derive_seed(self.seed, 'pool', index), self.random)
+            fakers.append(faker)
+        self.fake, self.canada_fake, self.vietnam_fake = fakers
+        self.address_store = AddressStore(derive_seed(self.seed, 'address'), pool_size, plain)
+        self.product_prices = ProductPrices(derive_seed(self.seed, 'product prices'))
+        self.names = GeneratedNames(self.seed)
+        self.ids = {table_name: IdRegistry() for table_name in TABLE_ID_LISTS}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Drops the id registries."""
+        for ids in self.ids.values():
+            ids.clear()
+
+    def stream(self, table_name, count, start_id=1):
+        """Returns (headers, lazy rows) for table_name; its id registry starts over."""
+        if table_name in self.ids:
+            self.ids[table_name].clear()
+        return TABLE_STREAMS[table_name](count, start_id=start_id, session=self)
+
+    def generate(self, table_name, count, start_id=1):
+        """Returns (headers, list of rows) for table_name; its id registry starts over."""
+        return collect(self.stream(table_name, count, start_id))
+
+
+class _ModuleSession(GeneratorSession):
+    """The session of the module-level functions: the module's random, Faker instances and registries.
+
+    It reads them on every use, so seed_generators, use_value_pools,
+    use_address_store, use_names and run_clock keep applying to it.
+    """
+
+    def __init__(self):
+        pass
+
+    random = property(lambda self: random)
+    fake = property(lambda self: fake)
+    canada_fake = property(lambda self: canada_fake)
+    vietnam_fake = property(lambda self: vietnam_fake)
+    address_store = property(lambda self: address_store)
+    product_prices = property(lambda self: product_prices)
+    names = property(lambda self: names)
+    clock = property(lambda self: current_time())
+    ids = property(lambda self: TABLE_ID_LISTS)
+
+
+default_session = _ModuleSession()
+
+
+# Foreign keys between tables. A product can also do without brands, in which
+# case it has no brand_id column.
+TABLE_DEPENDENCIES = {
+    'users': (),
+    'category': (),
+    'brand': (),
+    'product': ('category',),
+    'product_image': ('product',),
+    'invoice': ('users',),
+    'invoice_item': ('invoice', 'product'),
+    'contact_reply': ('users',),
+}
+OPTIONAL_DEPENDENCIES = {'product': ('brand',)}
+
+# How many throwaway parent rows the single-table modes create when a parent is missing.
+PLACEHOLDER_COUNTS = {'users': 10, 'category': 10, 'brand': 5, 'product': 10, 'invoice': 10}
+
+
+def prepare_parents(table_name):
+    """Generates the small placeholder parent tables a table needs before it can be created."""
+    for parent in TABLE_DEPENDENCIES[table_name] + OPTIONAL_DEPENDENCIES.get(table_name, ()):
+        if not TABLE_ID_LISTS[parent]:
+            prepare_parents(parent)
+            print(f"Generating {PLACEHOLDER_COUNTS[parent]} {parent} rows first "
+                  f"to ensure {table_name} data can be created...", file=sys.stderr)
+            collect(TABLE_STREAMS[parent](PLACEHOLDER_COUNTS[parent]))
+
+
+def collect(stream):
+    """Drains a (headers, rows) stream into the (headers, data) list form."""
+    headers, rows = stream
+    return headers, list(rows)
+
+
+def iter_batches(rows, batch_size=STREAM_BATCH_SIZE):
+    """Groups a row iterator into lists of at most batch_size rows."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(headers, rows, out=None, batch_size=STREAM_BATCH_SIZE, write_header=True):
+    """Writes rows to out (stdout by default) batch by batch and returns the row count."""
+    out = out if out is not None else sys.stdout
+    writer = csv.writer(out)
+    if write_header:
+        writer.writerow(headers)
+    count = 0
+    for batch in iter_batches(rows, batch_size):
+        writer.writerows(batch)
+        out.flush()
+        count += len(batch)
+    return count
 
 
 def print_csv(headers, data):
     """Prints data in CSV format to stdout."""
-    writer = csv.writer(sys.stdout)
-    writer.writerow(headers)
-    writer.writerows(data)
+    write_csv(headers, data)
 
 
-def main():
-    
-    table_name = input("Enter table name (users, category, brand, product, product_image, invoice, invoice_item, contact_reply): ").lower()
-    num_data = int(input("Enter number of records to generate: "))
-
-    headers = []
-    data = []
-
-    if table_name == 'users':
-        headers, data = generate_users(num_data)
-    elif table_name == 'category':
-        headers, data = generate_categories(num_data)
-    elif table_name == 'brand':
-        headers, data = generate_brands(num_data)
-    elif table_name == 'product':
-        if not category_ids:
-            print("Generating 10 categories first to ensure product data can be created...")
-            cat_headers, cat_data = generate_categories(10)
-        if not brand_ids:
-            print("Generating 5 brands first to allow products to link to brands...")
-            brand_headers, brand_data = generate_brands(5)
-        headers, data = generate_products(num_data)
-    elif table_name == 'product_image':
-        if not product_ids:
-            print("Generating 10 products first to ensure product image data can be created...")
-            prod_headers, prod_data = generate_products(10)
-        headers, data = generate_product_images(num_data)
-    elif table_name == 'invoice':
-        if not user_ids:
-            print("Generating 10 users first to ensure invoice data can be created...")
-            user_headers, user_data = generate_users(10)
-        headers, data = generate_invoices(num_data)
-    elif table_name == 'invoice_item':
-        if not invoice_ids:
-            print("Generating 10 invoices first to ensure invoice item data can be created...")
-            inv_headers, inv_data = generate_invoices(10)
-        if not product_ids:
-            print("Generating 10 products first to ensure invoice item data can be created...")
-            prod_headers, prod_data = generate_products(10)
-        headers, data = generate_invoice_items(num_data)
-    elif table_name == 'contact_reply':
-        if not user_ids:
-            print("Generating 10 users first to ensure contact reply data can be created...")
-            user_headers, user_data = generate_users(10)
-        headers, data = generate_contact_replies(num_data)
+# --- Bulk-load sinks ---
+# The generators mark missing values with the string 'NULL'. Every sink below
+# turns that marker into the real NULL of its target instead.
+OUTPUT_FORMATS = ('csv', 'mysql', 'postgres', 'sql', 'parquet', 'arrow')
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+OUTPUT_EXTENSIONS = {
+    'csv': '.csv', 'mysql': '.tsv', 'postgres': '.txt', 'sql': '.sql', 'parquet': '.parquet', 'arrow': '.arrow',
+}
+DEFAULT_INSERT_BATCH_SIZE = 1000
+
+# Table names in the Toolshop database.
+SQL_TABLE_NAMES = {
+    'users': 'users',
+    'category': 'categories',
+    'brand': 'brands',
+    'product': 'products',
+    'product_image': 'product_images',
+    'invoice': 'invoices',
+    'invoice_item': 'invoice_items',
+    'contact_reply': 'contact_replies',
+}
+
+_LOAD_FILE_ESCAPES = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+
+def _load_file_value(value):
+    if value is None or value == 'NULL':
+        return '\\N'
+    return str(value).translate(_LOAD_FILE_ESCAPES)
+
+
+def write_load_file(rows, out, batch_size=STREAM_BATCH_SIZE):
+    """Writes tab-separated rows with \\N for NULL; returns the row count.
+
+    This is the default text format of both MySQL LOAD DATA INFILE and Postgres
+    COPY ... FROM, so the file loads without options. There is no header line;
+    list the columns in the load statement.
+    """
+    count = 0
+    for batch in iter_batches(rows, batch_size):
+        out.write(''.join('\t'.join(map(_load_file_value, row)) + '\n' for row in batch))
+        out.flush()
+        count += len(batch)
+    return count
+
+
+def _sql_value(value):
+    if value is None or value == 'NULL':
+        return 'NULL'
+    if isinstance(value, (int, float)):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def write_sql_inserts(table_name, headers, rows, out, batch_size=DEFAULT_INSERT_BATCH_SIZE):
+    """Writes one multi-row INSERT statement per batch_size rows; returns the row count."""
+    prefix = f"INSERT INTO {SQL_TABLE_NAMES[table_name]} ({', '.join(headers)}) VALUES\n"
+    count = 0
+    for batch in iter_batches(rows, batch_size):
+        values = ',\n'.join('(' + ', '.join(map(_sql_value, row)) + ')' for row in batch)
+        out.write(prefix + values + ';\n')
+        out.flush()
+        count += len(batch)
+    return count
+
+
+def write_rows(table_name, headers, rows, out, output_format='csv', write_header=True,
+               insert_batch_size=DEFAULT_INSERT_BATCH_SIZE):
+    """Writes rows to the text stream out as csv, mysql, postgres or sql; returns the row count."""
+    if output_format == 'csv':
+        return write_csv(headers, rows, out, write_header=write_header)
+    if output_format in ('mysql', 'postgres'):
+        return write_load_file(rows, out)
+    if output_format == 'sql':
+        return write_sql_inserts(table_name, headers, rows, out, insert_batch_size)
+    raise ValueError(f"Unknown output format: {output_format}")
+
+
+def insert_rows(connection, table_name, headers, rows, batch_size=DEFAULT_INSERT_BATCH_SIZE, placeholder='?'):
+    """Inserts rows through a DB-API connection with executemany, in one transaction; returns the row count.
+
+    placeholder is the parameter marker of the driver ('?' for sqlite3, '%s'
+    for MySQLdb and psycopg).
+    """
+    statement = (f"INSERT INTO {SQL_TABLE_NAMES[table_name]} ({', '.join(headers)}) "
+                 f"VALUES ({', '.join([placeholder] * len(headers))})")
+    cursor = connection.cursor()
+    count = 0
+    try:
+        for batch in iter_batches(rows, batch_size):
+            cursor.executemany(statement, [[None if value == 'NULL' else value for value in row] for row in batch])
+            count += len(batch)
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        cursor.close()
+    return count
+
+
+# --- Columnar output ---
+# Parquet and Arrow files get typed columns built straight from the generated
+# rows, one row group / record batch per COLUMNAR_BATCH_SIZE rows. Columns with
+# a small fixed set of values are dictionary-encoded against that set, so every
+# batch shares one dictionary. Arrow files are written uncompressed so readers
+# can memory-map them without copying.
+COLUMNAR_BATCH_SIZE = 65536
+
+COLUMN_KINDS = {
+    'id': 'int', 'parent_id': 'int', 'category_id': 'int', 'brand_id': 'int', 'product_id': 'int',
+    'user_id': 'int', 'invoice_id': 'int', 'contact_id': 'int', 'quantity': 'int', 'status': 'int',
+    'sort_order': 'int', 'is_thumbnail': 'int', 'enabled': 'int', 'failed_login_attempts': 'int',
+    'price': 'float', 'unit_price': 'float',
+    'invoice_date': 'timestamp', 'created_at': 'timestamp', 'updated_at': 'timestamp', 'replied_at': 'timestamp',
+    'dob': 'date',
+    'country': 'dictionary', 'billing_country': 'dictionary', 'payment_method': 'dictionary',
+}
+TABLE_COLUMN_KINDS = {('invoice', 'status'): 'dictionary'}
+DICTIONARY_VALUES = {
+    'country': ADDRESS_COUNTRIES,
+    'billing_country': ADDRESS_COUNTRIES,
+    'payment_method': PAYMENT_METHODS,
+    'status': INVOICE_STATUSES,
+}
+
+
+def _require_pyarrow():
+    global pa, pc, pq
+    if pa is None:
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("parquet and arrow output need the pyarrow package (pip install pyarrow)") from None
+        pa, pc, pq = pyarrow, pyarrow.compute, pyarrow.parquet
+
+
+def _column_kind(table_name, column):
+    return TABLE_COLUMN_KINDS.get((table_name, column), COLUMN_KINDS.get(column, 'string'))
+
+
+def arrow_schema(table_name, headers):
+    """Returns the Arrow schema used for a table's columnar output."""
+    _require_pyarrow()
+    types = {
+        'int': pa.int64(), 'float': pa.float64(), 'timestamp': pa.timestamp('ms'), 'date': pa.date32(),
+        'dictionary': pa.dictionary(pa.int32(), pa.string()), 'string': pa.string(),
+    }
+    return pa.schema([(column, types[_column_kind(table_name, column)]) for column in headers])
+
+
+def _arrow_column(kind, column, values):
+    values = [None if value == 'NULL' else value for value in values]
+    if kind == 'int':
+        return pa.array(values, pa.int64())
+    if kind == 'float':
+        return pa.array(values, pa.float64())
+    if kind == 'timestamp':
+        return pc.strptime(pa.array(values, pa.string()), format='%Y-%m-%d %H:%M:%S', unit='ms')
+    if kind == 'date':
+        return pc.strptime(pa.array(values, pa.string()), format='%Y-%m-%d', unit='s').cast(pa.date32())
+    if kind == 'dictionary':
+        dictionary = pa.array(DICTIONARY_VALUES[column], pa.string())
+        indices = pc.index_in(pa.array(values, pa.string()), value_set=dictionary)
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+    return pa.array(values, pa.string())
+
+
+class ColumnarWriter:
+    """Writes batches of generated rows, or whole shard files, into one Parquet or Arrow file."""
+
+    def __init__(self, path, table_name, headers, output_format):
+        _require_pyarrow()
+        self.table_name = table_name
+        self.schema = arrow_schema(table_name, headers)
+        self.output_format = output_format
+        if output_format == 'parquet':
+            self._writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+        else:
+            self._writer = pa.ipc.new_file(path, self.schema)
+
+    def write_rows(self, rows):
+        columns = list(zip(*rows))
+        arrays = [
+            _arrow_column(_column_kind(self.table_name, field.name), field.name, values)
+            for field, values in zip(self.schema, columns)
+        ]
+        self._write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def write_file(self, path):
+        """Appends the row groups or record batches of a file written by another ColumnarWriter."""
+        if self.output_format == 'parquet':
+            part = pq.ParquetFile(path)
+            for index in range(part.num_row_groups):
+                self._writer.write_table(part.read_row_group(index))
+        else:
+            with pa.memory_map(path) as source:
+                part = pa.ipc.open_file(source)
+                for index in range(part.num_record_batches):
+                    self._writer.write_batch(part.get_batch(index))
+
+    def _write_table(self, table):
+        if self.output_format == 'parquet':
+            self._writer.write_table(table)
+        else:
+            self._writer.write(table)
+
+    def close(self):
+        self._writer.close()
+
+
+def write_columnar(table_name, headers, rows, path, output_format):
+    """Streams rows into a Parquet or Arrow file one row group at a time; returns the row count."""
+    writer = ColumnarWriter(path, table_name, headers, output_format)
+    count = 0
+    try:
+        for batch in iter_batches(rows, COLUMNAR_BATCH_SIZE):
+            writer.write_rows(batch)
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+
+# SQLite column types by COLUMN_KINDS kind; every other kind is stored as TEXT.
+SQLITE_TYPES = {'int': 'INTEGER', 'float': 'REAL'}
+CSV_CONVERTERS = {'int': int, 'float': float}
+
+
+def typed_rows(table_name, headers, rows):
+    """Turns the text fields of CSV rows back into the int and float values of their columns."""
+    converters = [CSV_CONVERTERS.get(_column_kind(table_name, column)) for column in headers]
+    for row in rows:
+        yield [value if convert is None or value == 'NULL' else convert(value)
+               for convert, value in zip(converters, row)]
+
+
+def open_sqlite(path, table_name, headers):
+    """Opens a SQLite database for insert_rows, creating the table if it does not exist yet."""
+    connection = sqlite3.connect(path, timeout=600)
+    columns = ', '.join(f"{column} {SQLITE_TYPES.get(_column_kind(table_name, column), 'TEXT')}"
+                        for column in headers)
+    connection.execute(f"CREATE TABLE IF NOT EXISTS {SQL_TABLE_NAMES[table_name]} ({columns})")
+    connection.commit()
+    return connection
+
+
+# --- Progress reporting ---
+# Long runs report rows done, rows/sec, ETA and RSS on stderr every
+# progress_interval seconds, and hand the same numbers to any registered hooks.
+# Finished tables are recorded in run_summary for the end-of-run JSON summary.
+PROGRESS_INTERVAL = 5.0
+progress_interval = PROGRESS_INTERVAL
+progress_output = sys.stderr
+progress_hooks = []
+run_summary = {}
+
+
+def add_progress_hook(callback, table_name=None):
+    """Calls callback(event) on every progress report of table_name, or of every table if None."""
+    progress_hooks.append((table_name, callback))
+
+
+def current_rss_kb():
+    """Returns this process's resident set size in KiB.
+
+    Where there is no /proc (macOS, the BSDs) it is the peak so far instead,
+    and where there is no resource module either (Windows) it is 0.
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') // 1024
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS counts ru_maxrss in bytes, everyone else in KiB.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def count_rows(rows, rows_done, worker_rss_kb=None, step=1000):
+    """Passes rows through, adding to the shared rows_done counter every step rows."""
+    pending = 0
+    for row in rows:
+        yield row
+        pending += 1
+        if pending == step:
+            with rows_done.get_lock():
+                rows_done.value += pending
+            pending = 0
+            if worker_rss_kb is not None:
+                rss = current_rss_kb()
+                with worker_rss_kb.get_lock():
+                    worker_rss_kb.value = max(worker_rss_kb.value, rss)
+    with rows_done.get_lock():
+        rows_done.value += pending
+
+
+class Counter:
+    """A counter with the value / get_lock() interface of multiprocessing.Value, for this process only."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def get_lock(self):
+        return self._lock
+
+
+class Progress:
+    """Tracks one table's generation and reports it from a background thread while it runs.
+
+    With shared set the counters live in shared memory, for shard workers to
+    count their own rows into.
+    """
+
+    def __init__(self, table_name, total, shared=False):
+        self.table_name = table_name
+        self.total = total
+        if shared:
+            self.rows_done = process_context().Value('q', 0)
+            self.worker_rss_kb = process_context().Value('q', 0)
+        else:
+            self.rows_done = Counter()
+            self.worker_rss_kb = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.started = perf_counter()
+        if progress_interval > 0:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        event = self.report(done=True)
+        run_summary[self.table_name] = {
+            key: event[key] for key in ('rows', 'seconds', 'rows_per_sec', 'rss_kb', 'worker_rss_kb')
+        }
+
+    def _run(self):
+        while not self._stop.wait(progress_interval):
+            self.report()
+
+    def event(self, done=False):
+        rows = self.rows_done.value
+        seconds = perf_counter() - self.started
+        rate = rows / seconds if seconds > 0 else 0.0
+        remaining = max(self.total - rows, 0)
+        return {
+            'table': self.table_name,
+            'rows': rows,
+            'total': self.total,
+            'seconds': round(seconds, 3),
+            'rows_per_sec': round(rate, 1),
+            'eta_seconds': round(remaining / rate, 1) if rate and not done else None,
+            'rss_kb': current_rss_kb(),
+            'worker_rss_kb': self.worker_rss_kb.value or None,
+            'done': done,
+        }
+
+    def report(self, done=False):
+        event = self.event(done)
+        if progress_output is not None:
+            eta = f"ETA {event['eta_seconds']:.0f}s" if event['eta_seconds'] is not None else 'done' if done else 'ETA ?'
+            rss_kb = max(event['rss_kb'], event['worker_rss_kb'] or 0)
+            print(f"[{self.table_name}] {event['rows']}/{self.total} rows  {event['rows_per_sec']:.0f} rows/s  "
+                  f"{eta}  RSS {rss_kb / 1024:.0f} MiB", file=progress_output, flush=True)
+        for table_name, callback in progress_hooks:
+            if table_name is None or table_name == self.table_name:
+                callback(event)
+        return event
+
+
+# --- Dataset cache ---
+# With --cache every table generate_sharded writes is also kept under a key
+# made of everything that decides its bytes: table, row count, seed, shard
+# size, output format, the run settings, the parent id domains and a version
+# hash of this file and the libraries it draws from. Editing the generator
+# changes every key, so stale entries are never served; they are simply the
+# first to go once the cache grows past its size limit, before the least
+# recently used ones.
+DEFAULT_CACHE_SIZE = 4 * 1024 ** 3
+dataset_cache = None
+
+
+def parse_size(text):
+    """Parses '500M', '2G' or a plain byte count into bytes."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)(?:i?B)?\s*', text, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"invalid size '{text}'; use e.g. 500M or 2G")
+    return int(float(match[1]) * 1024 ** ' KMGT'.index(match[2].upper() or ' '))
+
+
+def use_dataset_cache(directory, max_bytes=DEFAULT_CACHE_SIZE):
+    """Caches generated tables in directory (None turns the cache off)."""
+    global dataset_cache
+    dataset_cache = DatasetCache(directory, max_bytes) if directory else None
+
+
+def _package_version(name):
+    # importlib.metadata alone takes longer to import than a small table takes to generate.
+    from importlib import metadata
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return None
+
+
+@functools.lru_cache(maxsize=None)
+def source_digest():
+    """Returns a hash of this file's source."""
+    with open(os.path.abspath(__file__), 'rb') as source:
+        return hashlib.sha256(source.read()).hexdigest()[:16]
+
+
+def generator_version(output_format, vectorized):
+    """Returns a hash of the code that generates a table: this file plus the libraries it depends on."""
+    packages = ['faker']
+    if vectorized:
+        packages.append('numpy')
+    if output_format in COLUMNAR_FORMATS:
+        packages.append('pyarrow')
+    versions = [source_digest(), f"python {sys.version_info[0]}.{sys.version_info[1]}"]
+    versions += [f"{package} {_package_version(package)}" for package in packages]
+    return hashlib.sha256('\n'.join(versions).encode()).hexdigest()[:16]
+
+
+def _file_digest(path):
+    with open(path, 'rb') as weights:
+        return hashlib.sha256(weights.read()).hexdigest()[:16]
+
+
+def _settings_material(settings):
+    # fk_skew is keyed by (table, column) tuples, and a file distribution's
+    # weights count by their content, not their path.
+    skew, skew_seed = settings['fk_skew']
+    material = dict(settings)
+    material['fk_skew'] = [
+        sorted(['.'.join(key), kind, _file_digest(argument) if kind == 'file' else argument]
+               for key, (kind, argument) in skew.items()),
+        skew_seed,
+    ]
+    return material
+
+
+class DatasetCache:
+    """Generated table files in directory, keyed by everything that decides their content.
+
+    Each entry is a <key><ext> data file with a <key>.json description next to
+    it. A hit bumps the data file's mtime, which is what least recently used
+    eviction goes by.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_SIZE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, table_name, num_rows, seed, shard_size, output_format, parent_ids, settings):
+        material = {
+            'table': table_name,
+            'rows': num_rows,
+            'seed': seed,
+            'shard_size': shard_size,
+            'format': output_format,
+            'version': generator_version(output_format, settings['vectorized']),
+            'parents': {name: ids.fingerprint() for name, ids in parent_ids.items()},
+            'settings': _settings_material(settings),
+        }
+        return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+    def _path(self, key, suffix):
+        return os.path.join(self.directory, key + suffix)
+
+    def open(self, key):
+        """Returns (open binary data file, description) of a cached table, or None on a miss.
+
+        The file is opened before anything else can evict it, so serving it
+        never races with another run's eviction.
+        """
+        try:
+            with open(self._path(key, '.json')) as meta:
+                description = json.load(meta)
+            path = self._path(key, OUTPUT_EXTENSIONS[description['format']])
+            data = open(path, 'rb')
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(path)
+        return data, description
+
+    def staging_path(self, key):
+        """Returns a fresh file in the cache directory to generate a table into before store."""
+        handle, path = tempfile.mkstemp(prefix=key + '.', suffix='.tmp', dir=self.directory)
+        os.close(handle)
+        return path
+
+    def add(self, key, path, description):
+        """Copies the table file at path into the cache under key.
+
+        A copy rather than a hard link: the output is opened with 'w' or 'a' by
+        later runs, which would rewrite the cached file in place.
+        """
+        if os.path.getsize(path) > self.max_bytes:
+            return False
+        staged = self.staging_path(key)
+        shutil.copyfile(path, staged)
+        return self.store(key, staged, description)
+
+    def store(self, key, staged, description):
+        """Moves the staged file into the cache under key, then evicts down to max_bytes."""
+        size = os.path.getsize(staged)
+        if size > self.max_bytes:
+            os.remove(staged)
+            return False
+        description = dict(description, bytes=size, source=source_digest())
+        with self._lock:
+            os.replace(staged, self._path(key, OUTPUT_EXTENSIONS[description['format']]))
+            handle, meta_path = tempfile.mkstemp(prefix=key + '.', suffix='.tmp', dir=self.directory)
+            with os.fdopen(handle, 'w') as meta:
+                json.dump(description, meta)
+            os.replace(meta_path, self._path(key, '.json'))
+            self.evict()
+        return True
+
+    def entries(self):
+        """Returns (key, data path, description, mtime) of every complete entry."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-len('.json')]
+            try:
+                with open(self._path(key, '.json')) as meta:
+                    description = json.load(meta)
+                path = self._path(key, OUTPUT_EXTENSIONS[description['format']])
+                entries.append((key, path, description, os.path.getmtime(path)))
+            except (OSError, ValueError, KeyError):
+                continue
+        return entries
+
+    def evict(self):
+        """Removes entries of other generator versions, then the least recently used, until under max_bytes."""
+        entries = self.entries()
+        total = sum(description['bytes'] for _, _, description, _ in entries)
+        current = source_digest()
+        entries.sort(key=lambda entry: (entry[2].get('source') == current, entry[3]))
+        for key, path, description, _ in entries:
+            if total <= self.max_bytes:
+                break
+            for stale in (self._path(key, '.json'), path):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            total -= description['bytes']
+
+
+class TeeWriter:
+    """Writes to stream and to a new text file at path at the same time."""
+
+    def __init__(self, stream, path):
+        self.path = path
+        self._stream = stream
+        self._copy = open(path, 'w', newline='')
+
+    def write(self, data):
+        self._stream.write(data)
+        return self._copy.write(data)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        self._copy.close()
+        if exc_type is not None:
+            os.remove(self.path)
+
+
+def serve_cached(data, output=None):
+    """Writes an open cached file to output (a path) or stdout through a memory map, then closes it."""
+    with data:
+        size = os.fstat(data.fileno()).st_size
+        if output:
+            out_context = open(output, 'wb')
+        else:
+            sys.stdout.flush()
+            out_context = nullcontext(sys.stdout.buffer)
+        with out_context as out:
+            if size:
+                with mmap.mmap(data.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    out.write(mapped)
+            out.flush()
+
+
+# --- Parallel sharded generation ---
+# A table's id range is cut into fixed-size shards and every shard is seeded
+# from (seed, table, shard index) alone. Which worker runs a shard, and how many
+# workers there are, never changes what the shard contains.
+DEFAULT_SHARD_SIZE = 50000
+# Tables whose rows depend on every earlier row of the table run as one shard.
+ORDERED_TABLES = ('product_image',)
+
+
+def derive_seed(seed, *parts):
+    """Derives a stable 64-bit seed from a base seed and labels such as table name and shard index."""
+    key = ':'.join(str(part) for part in (seed,) + parts)
+    return int.from_bytes(hashlib.sha256(key.encode()).digest()[:8], 'big')
+
+
+def seed_generators(seed):
+    """Reseeds the random module and the shared Faker state."""
+    random.seed(seed)
+    seed_faker(seed)
+
+
+def _shard_settings(clock, first_id=1):
+    """Collects the run-wide settings every shard worker has to share with the parent."""
+    return {
+        'clock': clock,
+        'plain_emails': first_id == 1,
+        'value_pools': (value_pool_size, value_pool_seed),
+        'passwords': (password_plaintexts, password_digests),
+        'address_seed': address_seed,
+        'price_seed': price_seed,
+        'category_tree': category_tree,
+        'name_seed': names.seed,
+        'invoice_dates': invoice_date_distribution,
+        'fk_skew': (fk_skew, fk_skew_seed),
+        'vectorized': vectorized,
+        'image_sort_orders': {},
+    }
+
+
+class _ShardSession(_ModuleSession):
+    """The module session with the per-table state of one sharded table and only its parents' ids."""
+
+    ids = None
+
+    def __init__(self, parent_ids, settings):
+        self.ids = {name: parent_ids.get(name) or IdRegistry() for name in TABLE_ID_LISTS}
+        self.plain_emails = settings['plain_emails']
+        self.image_sort_orders = settings['image_sort_orders']
+        self.email_partition = (0, 1)
+
+
+_shard_counters = None
+_shard_session = None
+
+
+def _init_shard_worker(parent_ids, settings, counters, tables):
+    global run_clock, password_plaintexts, password_digests, _shard_counters, _shard_session
+    _shard_counters = counters
+    run_clock = settings['clock']
+    use_value_pools(*settings['value_pools'])
+    password_plaintexts, password_digests = settings['passwords']
+    use_address_store(settings['address_seed'])
+    use_product_prices(settings['price_seed'])
+    use_category_tree(*settings['category_tree'])
+    use_names(settings['name_seed'])
+    use_invoice_dates(settings['invoice_dates'])
+    use_fk_skew(*settings['fk_skew'])
+    use_skew_tables(tables)
+    use_vectorized(settings['vectorized'])
+    _shard_session = _ShardSession(parent_ids, settings)
+
+
+def _generate_shard(task, session=None):
+    table_name, shard_index, shard_count, start_id, count, seed, path, output_format, write_header = task
+    session = session or _shard_session
+    seed_generators(derive_seed(seed, table_name, shard_index))
+    session.email_partition = (shard_index, shard_count)
+    own_ids = session.ids.get(table_name)
+    if own_ids is not None:
+        own_ids.clear()
+    headers, rows = TABLE_STREAMS[table_name](count, start_id=start_id, session=session)
+    if _shard_counters is not None:
+        rows = count_rows(rows, *_shard_counters)
+    if output_format in COLUMNAR_FORMATS:
+        return path, write_columnar(table_name, headers, rows, path, output_format)
+    with open(path, 'w', newline='') as out:
+        written = write_rows(table_name, headers, rows, out, output_format, write_header)
+    return path, written
+
+
+# A table with one worker or a single shard is generated in this process: a
+# pool would only add the start of a fresh interpreter. Its shards reseed the
+# module's random state and set the run clock like a worker does, so such
+# tables run one at a time.
+_in_process_lock = threading.Lock()
+
+
+class _InProcessPool:
+    """Stands in for generate_sharded's worker pool and runs the shards one by one in this process.
+
+    Every other setting a worker gets is read from the module state
+    _shard_settings collected it from, so only the clock and counters are set.
+    """
+
+    def __init__(self, parent_ids, settings, counters):
+        self._session = _ShardSession(parent_ids, settings)
+        self._clock = settings['clock']
+        self._counters = counters[:1]
+
+    def __enter__(self):
+        global run_clock, _shard_counters
+        _in_process_lock.acquire()
+        self._saved = (run_clock, _shard_counters)
+        run_clock, _shard_counters = self._clock, self._counters
+        return self
+
+    def __exit__(self, *exc_info):
+        global run_clock, _shard_counters
+        run_clock, _shard_counters = self._saved
+        _in_process_lock.release()
+
+    def imap(self, function, tasks):
+        for task in tasks:
+            yield function(task, self._session)
+
+
+def generate_sharded(table_name, num_rows, seed, workers=1, shard_size=DEFAULT_SHARD_SIZE,
+                     output=None, keep_shards=False, parents=None, output_format='csv', sqlite_path=None,
+                     first_id=1):
+    """Generates a table on a process pool and merges the shards in id order; returns the row count.
+
+    With one worker, or a single shard, the shards run in this process
+    instead. With keep_shards the shard files (each with its own CSV header)
+    are left next to output instead of being merged into it. With sqlite_path every
+    shard is inserted into that database, one transaction per shard, instead.
+    parents limits which id lists are handed to the workers (default: every
+    list that has ids). With first_id above 1 the rows continue an existing
+    output file: ids start at first_id and the rows are appended without a
+    header, with the columns the file already has (see match_columns).
+    Tables in ORDERED_TABLES always run as a single shard. With
+    dataset_cache set, a table written whole to output or stdout
+    is served from the cache when the same table was generated before.
+    """
+    headers, _ = TABLE_STREAMS[table_name](0)
+    if not headers:
+        return 0
+    appending = first_id > 1
+    if appending:
+        seed = derive_seed(seed, 'append', first_id)
+    if table_name in ORDERED_TABLES:
+        shard_size = max(num_rows, 1)
+    if parents is None:
+        parents = [name for name in TABLE_ID_LISTS if name != table_name]
+    if appending and output:
+        headers, parents = match_columns(table_name, headers, parents, column_count(output, output_format))
+    parent_ids = {name: TABLE_ID_LISTS[name] for name in parents if TABLE_ID_LISTS[name]}
+    clock = run_clock if run_clock is not None else datetime.now().replace(microsecond=0)
+    settings = _shard_settings(clock, first_id)
+    if appending and table_name == 'product_image':
+        settings['image_sort_orders'] = load_image_sort_orders(output, first_id - 1)
+    columnar = output_format in COLUMNAR_FORMATS and not sqlite_path
+    if columnar and not output and not keep_shards:
+        raise ValueError(f"{output_format} output has to go to a file, not stdout")
+    own_ids = TABLE_ID_LISTS.get(table_name)
+
+    cache_key = None
+    if dataset_cache is not None and not (appending or keep_shards or sqlite_path):
+        cache_key = dataset_cache.key(table_name, num_rows, seed, shard_size, output_format, parent_ids, settings)
+        cached = dataset_cache.open(cache_key)
+        if cached is not None:
+            data, description = cached
+            started = perf_counter()
+            serve_cached(data, output)
+            if own_ids is not None:
+                own_ids.assign(range(1, num_rows + 1))
+            run_summary[table_name] = {
+                'rows': description['rows'], 'seconds': round(perf_counter() - started, 3), 'cached': True,
+            }
+            print(f"[{table_name}] {description['rows']} rows from the dataset cache", file=sys.stderr)
+            return description['rows']
+
+    if output:
+        base_path = os.path.abspath(output)
+    else:
+        base_path = os.path.join(tempfile.mkdtemp(prefix=f'{table_name}-shards-'), f'{table_name}.csv')
+    starts = range(first_id, first_id + num_rows, shard_size)
+    tasks = [
+        (table_name, index, len(starts), start_id, min(shard_size, first_id + num_rows - start_id), seed,
+         f"{base_path}.part{index:05d}", 'csv' if sqlite_path else output_format, keep_shards)
+        for index, start_id in enumerate(starts)
+    ]
+
+    count = 0
+    if keep_shards or sqlite_path or columnar:
+        out_context = nullcontext(None)
+    elif output:
+        out_context = open(output, 'a' if appending else 'w', newline='')
+    elif cache_key is not None:
+        # Nothing on disk to copy into the cache afterwards: keep a copy as the rows go out.
+        out_context = TeeWriter(sys.stdout, dataset_cache.staging_path(cache_key))
+    else:
+        out_context = nullcontext(sys.stdout)
+    in_process = workers == 1 or len(tasks) == 1
+    progress = Progress(table_name, num_rows, shared=not in_process)
+    counters = (progress.rows_done, progress.worker_rss_kb)
+    if in_process:
+        pool_context = _InProcessPool(parent_ids, settings, counters)
     else:
-        print("Invalid table name. Please choose from: users, category, brand, product, product_image, invoice, invoice_item, contact_reply.")
+        pool_context = process_context().Pool(workers, initializer=_init_shard_worker,
+                                              initargs=(parent_ids, settings, counters,
+                                                        skew_tables(table_name, parent_ids)))
+    # The product images written to a text file keep its sort orders up to date.
+    sort_orders = None
+    if table_name == 'product_image' and output and not (keep_shards or sqlite_path or columnar):
+        sort_orders = dict(settings['image_sort_orders'])
+    with pool_context as pool, out_context as out, progress:
+        connection = open_sqlite(sqlite_path, table_name, headers) if sqlite_path else None
+        merged = ColumnarWriter(output, table_name, headers, output_format) if columnar and not keep_shards else None
+        if out is not None and output_format == 'csv' and not appending:
+            csv.writer(out).writerow(headers)
+        for path, written in pool.imap(_generate_shard, tasks):
+            count += written
+            if connection is not None:
+                with open(path, newline='') as part:
+                    rows = typed_rows(table_name, headers, csv.reader(part))
+                    insert_rows(connection, table_name, headers, rows)
+                os.remove(path)
+            elif merged is not None:
+                merged.write_file(path)
+                os.remove(path)
+            elif out is not None:
+                if sort_orders is not None:
+                    for product_id, order in image_sort_orders_in(path).items():
+                        sort_orders[product_id] = max(order, sort_orders.get(product_id, 0))
+                with open(path, newline='') as part:
+                    shutil.copyfileobj(part, out)
+                os.remove(path)
+        if connection is not None:
+            connection.close()
+        if merged is not None:
+            merged.close()
+    if sort_orders is not None:
+        save_image_sort_orders(output, first_id + num_rows - 1, sort_orders)
+    if not output and not keep_shards:
+        os.rmdir(os.path.dirname(base_path))
+    if cache_key is not None:
+        description = {'table': table_name, 'rows': count, 'format': output_format}
+        if output:
+            dataset_cache.add(cache_key, output, description)
+        else:
+            dataset_cache.store(cache_key, out_context.path, description)
+
+    if own_ids is not None:
+        own_ids.assign(range(1, first_id + num_rows))
+    return count
+
+
+# --- Resuming existing output ---
+# Every table's ids run 1..N in file order, so the last row of a file tells both
+# where to continue and the whole id domain other tables may reference. Only
+# the tail of the file is read.
+APPEND_FORMATS = ('csv', 'mysql', 'postgres', 'sql')
+TAIL_BLOCK_SIZE = 64 * 1024
+# The first column of a data row in any of APPEND_FORMATS: "12,", "12\t" or "(12, ".
+_ROW_ID = re.compile(rb'\(?(\d+)[,\t]')
+
+
+def last_row_id(path):
+    """Returns the id of the last row of a table file, or 0 if it has no rows."""
+    with open(path, 'rb') as table_file:
+        position = table_file.seek(0, os.SEEK_END)
+        tail = b''
+        while position > 0:
+            step = min(TAIL_BLOCK_SIZE, position)
+            position -= step
+            table_file.seek(position)
+            tail = table_file.read(step) + tail
+            lines = tail.split(b'\n')
+            # Unless the block reaches the start of the file its first line may be cut off.
+            complete = lines if position == 0 else lines[1:]
+            for line in reversed(complete):
+                match = _ROW_ID.match(line)
+                if match:
+                    return int(match.group(1))
+            tail = lines[0]
+    return 0
+
+
+def column_count(path, output_format):
+    """Returns how many columns the rows of a table file in one of APPEND_FORMATS have."""
+    with open(path, newline='') as table_file:
+        if output_format == 'csv':
+            return len(next(csv.reader(table_file), []))
+        first_line = table_file.readline().rstrip('\n')
+    if output_format == 'sql':
+        # INSERT INTO products (id, category_id, ...) VALUES
+        return len(first_line.partition('(')[2].partition(')')[0].split(', '))
+    return len(first_line.split('\t'))
+
+
+def match_columns(table_name, headers, parents, width):
+    """Returns the (headers, parents) that give rows of width columns, as an existing file has.
+
+    A table that was written without an optional parent (a product file from
+    before brand.csv existed) keeps being extended without its column.
+    Raises ValueError when no choice of parents gives that width.
+    """
+    if width == len(headers):
+        return headers, parents
+    for optional in OPTIONAL_DEPENDENCIES.get(table_name, ()):
+        column = f'{optional}_id'
+        if column in headers and width == len(headers) - 1:
+            return [name for name in headers if name != column], [name for name in parents if name != optional]
+    raise ValueError(f"the {table_name} file has {width} columns but the new rows would have {len(headers)} "
+                     f"({', '.join(headers)})")
+
+
+def table_path(directory, table_name, output_format):
+    """Returns where a table of output_format lives in directory."""
+    return os.path.join(directory, table_name + OUTPUT_EXTENSIONS[output_format])
+
+
+def resume_id_domains(directory, table_names, output_format):
+    """Points the id lists of table_names at the ids already in directory; returns {table: last id}.
+
+    Tables without a file in directory are left out.
+    """
+    last_ids = {}
+    for table_name in table_names:
+        path = table_path(directory, table_name, output_format)
+        if not os.path.exists(path):
+            continue
+        last_ids[table_name] = last_row_id(path)
+        if table_name in TABLE_ID_LISTS:
+            TABLE_ID_LISTS[table_name].assign(range(1, last_ids[table_name] + 1))
+    return last_ids
+
+
+# Which seed generated each table file is recorded in DATASET_FILE next to it:
+# appended rows only match the existing ones (billing addresses, unit prices)
+# when they come from the same seed.
+DATASET_FILE = 'dataset.json'
+
+
+def dataset_seeds(directory):
+    """Returns the {table: seed} recorded in directory, or {} if none is."""
+    try:
+        with open(os.path.join(directory, DATASET_FILE)) as dataset:
+            return json.load(dataset)['seeds']
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def record_dataset_seeds(directory, table_names, seed):
+    """Records that the table files of table_names in directory were generated with seed."""
+    seeds = dataset_seeds(directory)
+    seeds.update(dict.fromkeys(table_names, seed))
+    with open(os.path.join(directory, DATASET_FILE), 'w') as dataset:
+        json.dump({'seeds': seeds}, dataset, indent=2, sort_keys=True)
+
+
+def append_seed(directory, table_names, seed=None):
+    """Returns the seed to extend the tables of table_names in directory with (and their parents).
+
+    That is the seed recorded for them, which seed (if given) has to equal.
+    Raises ValueError when it cannot be known or does not match.
+    """
+    related = set(table_names)
+    for table_name in table_names:
+        related.update(TABLE_DEPENDENCIES[table_name] + OPTIONAL_DEPENDENCIES.get(table_name, ()))
+    recorded = dataset_seeds(directory)
+    seeds = {recorded[name] for name in related if name in recorded}
+    if len(seeds) > 1:
+        raise ValueError(f"the tables in {directory} were generated with different seeds "
+                         f"({', '.join(map(str, sorted(seeds)))})")
+    if not seeds:
+        if seed is None:
+            raise ValueError(f"{directory} has no {DATASET_FILE}; pass the --seed its tables were generated with")
+        return seed
+    recorded_seed = seeds.pop()
+    if seed is not None and seed != recorded_seed:
+        raise ValueError(f"--seed {seed} differs from the seed {recorded_seed} the tables in {directory} "
+                         f"were generated with")
+    return recorded_seed
+
+
+# --- Whole-schema generation ---
+def parse_spec(spec):
+    """Parses 'users=1000,invoice=5000' into {'users': 1000, 'invoice': 5000}."""
+    counts = {}
+    for item in spec.split(','):
+        table_name, _, count = item.partition('=')
+        table_name = table_name.strip()
+        if table_name not in TABLE_STREAMS:
+            raise ValueError(f"Unknown table '{table_name}' in spec")
+        counts[table_name] = int(count)
+    return counts
+
+
+def table_dependencies(counts, existing=()):
+    """Returns, for each table in counts, the tables in counts it has to wait for.
+
+    A parent listed in existing (already on disk) does not have to be in counts.
+    """
+    dependencies = {}
+    for table_name in counts:
+        for parent in TABLE_DEPENDENCIES[table_name]:
+            if parent not in counts and parent not in existing:
+                raise ValueError(f"'{table_name}' needs '{parent}' in the spec")
+        dependencies[table_name] = [
+            parent for parent in TABLE_DEPENDENCIES[table_name] + OPTIONAL_DEPENDENCIES.get(table_name, ())
+            if parent in counts
+        ]
+    return dependencies
+
+
+class ProcessSlots:
+    """The worker processes the tables of one generate_schema run share between them."""
+
+    def __init__(self, total):
+        self.available = total
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def take(self, wanted):
+        """Waits for a free slot, holds up to wanted of them and yields how many it got."""
+        with self._condition:
+            self._condition.wait_for(lambda: self.available > 0)
+            granted = min(wanted, self.available)
+            self.available -= granted
+        try:
+            yield granted
+        finally:
+            with self._condition:
+                self.available += granted
+                self._condition.notify_all()
+
+
+def _generate_in_slots(slots, table_name, num_rows, seed, workers, shard_size, *args):
+    """Runs generate_sharded with as many of its workers as slots has free (at least one)."""
+    shards = 1 if table_name in ORDERED_TABLES else max(1, math.ceil(num_rows / shard_size))
+    with slots.take(min(workers, shards)) as granted:
+        return generate_sharded(table_name, num_rows, seed, granted, shard_size, *args)
+
+
+def generate_schema(counts, seed, out_dir, workers=1, shard_size=DEFAULT_SHARD_SIZE,
+                    output_format='csv', sqlite_path=None, append=False):
+    """Generates every table in counts exactly once into out_dir/<table><ext>; returns {table: rows}.
+
+    A table starts as soon as its parents are finished, so independent branches
+    (users -> invoices next to categories -> products) run at the same time.
+    The running tables share workers processes between them: a table takes
+    as many of the free ones as it has shards, and waits for one if none is
+    free. How they are shared does not change the output. With sqlite_path
+    every table is loaded into that database instead of written to out_dir.
+    With append the tables already in out_dir are extended by counts rows, and
+    tables outside counts serve as parents with the ids they already have.
+    """
+    global run_clock
+    last_ids = resume_id_domains(out_dir, TABLE_STREAMS, output_format) if append else {}
+    dependencies = table_dependencies(counts, last_ids)
+    if run_clock is None:
+        run_clock = datetime.now().replace(microsecond=0)
+    os.makedirs(out_dir, exist_ok=True)
+
+    written = {}
+    pending = dict(dependencies)
+    running = {}
+    slots = ProcessSlots(max(workers, 1))
+    with ThreadPoolExecutor(max_workers=len(counts)) as executor:
+        while pending or running:
+            ready = [name for name, parents in pending.items() if all(p in written for p in parents)]
+            for table_name in ready:
+                del pending[table_name]
+                parents = dependencies[table_name] + [
+                    parent for parent in TABLE_DEPENDENCIES[table_name] + OPTIONAL_DEPENDENCIES.get(table_name, ())
+                    if parent in last_ids and parent not in counts
+                ]
+                future = executor.submit(
+                    _generate_in_slots, slots, table_name, counts[table_name], seed, workers, shard_size,
+                    table_path(out_dir, table_name, output_format), False,
+                    parents, output_format, sqlite_path, last_ids.get(table_name, 0) + 1)
+                running[future] = table_name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                table_name = running.pop(future)
+                written[table_name] = future.result()
+                print(f"Generated {written[table_name]} records for the '{table_name}' table.", file=sys.stderr)
+    return written
+
+
+def parse_args(argv):
+    """Parses the non-interactive command line."""
+    parser = argparse.ArgumentParser(description="Generate Toolshop test data as CSV.")
+    parser.add_argument('table', nargs='?', choices=list(TABLE_STREAMS))
+    parser.add_argument('count', nargs='?', type=int, help="number of records to generate")
+    parser.add_argument('--spec', default=None,
+                        help="generate a whole schema at once, e.g. users=1000,invoice=5000,invoice_item=20000")
+    parser.add_argument('--out-dir', default='.', help="directory for the per-table files of --spec")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="base seed; the same seed gives the same output for any --workers")
+    parser.add_argument('--workers', type=int, default=1, help="number of generator processes")
+    parser.add_argument('--shard-size', type=int, default=DEFAULT_SHARD_SIZE, help="rows per shard")
+    parser.add_argument('--output', '-o', default=None, help="output CSV file (default: stdout)")
+    parser.add_argument('--append', action='store_true',
+                        help="extend the existing --output file (or the --out-dir files of --spec) instead of "
+                             "overwriting it; parents are read from the files next to it, and the seed from "
+                             f"the {DATASET_FILE} there unless --seed is given; product images continue from "
+                             f"the {SORT_ORDERS_SUFFIX} file next to theirs, or from a scan of the whole file "
+                             "when that is missing or out of date")
+    parser.add_argument('--keep-shards', action='store_true',
+                        help="leave one CSV file per shard next to --output instead of merging")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='csv',
+                        help="csv, mysql (LOAD DATA tsv), postgres (COPY text), sql (multi-row INSERTs), "
+                             "parquet or arrow (columnar, needs pyarrow and a file)")
+    parser.add_argument('--sqlite', default=None,
+                        help="insert the rows into this SQLite database instead of writing a file")
+    parser.add_argument('--pool-size', type=int, default=0,
+                        help="pre-generate this many values per Faker field and sample from them "
+                             "(faster, fewer distinct values); 0 calls Faker for every row")
+    parser.add_argument('--passwords', default=','.join(DEFAULT_PASSWORDS),
+                        help="comma-separated plaintext passwords to assign to users")
+    parser.add_argument('--password-algorithm', choices=PASSWORD_ALGORITHMS, default='sha256',
+                        help="how user passwords are hashed; bcrypt and argon2 give hashes the API accepts")
+    parser.add_argument('--password-cost', type=int, default=DEFAULT_PASSWORD_COST,
+                        help="bcrypt log rounds or argon2 time cost")
+    parser.add_argument('--login-fixture', default=None,
+                        help="also write an email,password CSV for k6 (needs the users table in a file)")
+    parser.add_argument('--login-limit', type=int, default=None, help="maximum rows in --login-fixture")
+    parser.add_argument('--k6-fixtures', default=None,
+                        help="also deal the users' logins and the product names into per-VU k6 files in this "
+                             "directory (needs the users and/or product table as CSV files)")
+    parser.add_argument('--k6-vus', default='1',
+                        help="VUs to write --k6-fixtures for: a number, or per scenario as load=30,spike=100")
+    parser.add_argument('--k6-per-vu', type=int, default=None,
+                        help="maximum logins and product names per VU file (default: deal out all of them)")
+    parser.add_argument('--category-tree', default=','.join(map(str, DEFAULT_CATEGORY_TREE)),
+                        help="shape of the generated category forest as ROOTS,FAN_OUT,DEPTH")
+    parser.add_argument('--as-of', default=None,
+                        help="reference clock 'YYYY-MM-DD HH:MM:SS' for every timestamp (default: now)")
+    parser.add_argument('--invoice-dates', choices=INVOICE_DATE_DISTRIBUTIONS, default='days',
+                        help="how invoice dates spread over the year before the clock")
+    parser.add_argument('--fk-skew', default='',
+                        help="skewed foreign keys, e.g. invoice_item.product_id=zipf:1.1,invoice.user_id=power:2,"
+                             "contact_reply.user_id=file:weights.csv (id,weight lines); others stay uniform")
+    parser.add_argument('--vectorized', action='store_true',
+                        help="draw the numeric columns of products, images, invoices and invoice items in "
+                             "NumPy batches (needs numpy; output differs from the default mode)")
+    parser.add_argument('--cache', default=None, metavar='DIR',
+                        help="keep generated tables in DIR and serve repeat requests (same table, count, seed, "
+                             "options and generator code) from it; needs --as-of to reuse tables across runs")
+    parser.add_argument('--cache-size', default='4G',
+                        help="evict least recently used cached tables beyond this size (default: 4G)")
+    parser.add_argument('--progress', type=float, default=PROGRESS_INTERVAL,
+                        help="seconds between progress lines on stderr; 0 turns them off")
+    parser.add_argument('--summary', default=None,
+                        help="write a JSON run summary (wall time per table) to this file, or - for stderr")
+    args = parser.parse_args(argv)
+    if args.spec is None and (args.table is None or args.count is None):
+        parser.error("give a table and a count, or --spec")
+    if args.format in COLUMNAR_FORMATS and args.spec is None and not args.output and not args.sqlite:
+        parser.error(f"--format {args.format} needs --output")
+    if args.append and (args.format not in APPEND_FORMATS or args.sqlite or args.keep_shards):
+        parser.error(f"--append works with --format {', '.join(APPEND_FORMATS)} files only")
+    if args.append and args.spec is None and not args.output:
+        parser.error("--append needs --output")
+    try:
+        args.category_tree = tuple(int(part) for part in args.category_tree.split(','))
+        use_category_tree(*args.category_tree)
+    except (TypeError, ValueError) as error:
+        parser.error(f"--category-tree: {error}")
+    try:
+        args.fk_skew = parse_fk_skew(args.fk_skew)
+    except ValueError as error:
+        parser.error(f"--fk-skew: {error}")
+    try:
+        args.k6_vus = parse_k6_vus(args.k6_vus)
+    except ValueError as error:
+        parser.error(f"--k6-vus: {error}")
+    try:
+        args.cache_size = parse_size(args.cache_size)
+    except ValueError as error:
+        parser.error(f"--cache-size: {error}")
+    if args.as_of is not None:
+        try:
+            args.as_of = datetime.strptime(args.as_of, TIMESTAMP_FORMAT)
+        except ValueError as error:
+            parser.error(f"--as-of: {error}")
+    if args.spec is not None:
+        try:
+            args.counts = parse_spec(args.spec)
+            existing = [name for name in TABLE_STREAMS
+                        if args.append and os.path.exists(table_path(args.out_dir, name, args.format))]
+            table_dependencies(args.counts, existing)
+        except ValueError as error:
+            parser.error(str(error))
+    return args
+
+
+def write_summary(path, seed, seconds):
+    """Writes run_summary plus the run's total wall time as JSON to path ('-' for stderr)."""
+    summary = {'seed': seed, 'seconds': round(seconds, 3), 'tables': run_summary}
+    if path == '-':
+        json.dump(summary, sys.stderr, indent=2)
+        print(file=sys.stderr)
+    else:
+        with open(path, 'w') as out:
+            json.dump(summary, out, indent=2)
+
+
+def run_cli(argv):
+    global progress_interval, progress_output, run_clock
+    started = perf_counter()
+    args = parse_args(argv)
+    if args.progress <= 0:
+        progress_output = None
+    else:
+        progress_interval = args.progress
+    if args.append:
+        directory = args.out_dir if args.spec is not None else os.path.dirname(os.path.abspath(args.output))
+        try:
+            seed = append_seed(directory, list(args.counts) if args.spec is not None else [args.table], args.seed)
+        except ValueError as error:
+            print(f"--append: {error}.", file=sys.stderr)
+            return
+    else:
+        seed = args.seed if args.seed is not None else random.randrange(2 ** 32)
+    if args.as_of is not None:
+        run_clock = args.as_of
+    use_invoice_dates(args.invoice_dates)
+    use_fk_skew(args.fk_skew, seed)
+    use_vectorized(args.vectorized)
+    use_dataset_cache(args.cache, args.cache_size)
+    if args.cache and args.as_of is None:
+        print("--cache: without --as-of every run has its own clock, so no cached table will match it.",
+              file=sys.stderr)
+    use_value_pools(args.pool_size, seed)
+    use_address_store(seed)
+    use_product_prices(seed)
+    use_names(seed)
+    use_passwords(args.passwords.split(','), args.password_algorithm, args.password_cost, seed, args.workers)
+    if args.spec is not None:
+        try:
+            generate_schema(args.counts, seed, args.out_dir, workers=args.workers, shard_size=args.shard_size,
+                            output_format=args.format, sqlite_path=args.sqlite, append=args.append)
+        except ValueError as error:
+            if not args.append:
+                raise
+            print(f"--append: {error}.", file=sys.stderr)
+            return
+        if not args.sqlite:
+            record_dataset_seeds(args.out_dir, args.counts, seed)
+        users_path = os.path.join(args.out_dir, 'users.csv') if 'users' in args.counts else None
+        products_path = os.path.join(args.out_dir, 'product.csv') if 'product' in args.counts else None
+    else:
+        first_id = 1
+        seed_generators(derive_seed(seed, 'parents'))
+        if args.append:
+            parents = TABLE_DEPENDENCIES[args.table] + OPTIONAL_DEPENDENCIES.get(args.table, ())
+            found = resume_id_domains(os.path.dirname(os.path.abspath(args.output)), parents, args.format)
+            missing = [parent for parent in TABLE_DEPENDENCIES[args.table] if not found.get(parent)]
+            if missing:
+                print(f"--append: no {', '.join(missing)} rows next to {args.output}.", file=sys.stderr)
+                return
+            if os.path.exists(args.output):
+                first_id = last_row_id(args.output) + 1
+        else:
+            prepare_parents(args.table)
+        try:
+            count = generate_sharded(args.table, args.count, seed, workers=args.workers,
+                                     shard_size=args.shard_size, output=args.output, keep_shards=args.keep_shards,
+                                     output_format=args.format, sqlite_path=args.sqlite, first_id=first_id)
+        except ValueError as error:
+            if not args.append:
+                raise
+            print(f"--append: {error}.", file=sys.stderr)
+            return
+        print(f"Generated {count} records for the '{args.table}' table (seed {seed}).", file=sys.stderr)
+        if args.output and not (args.keep_shards or args.sqlite):
+            record_dataset_seeds(os.path.dirname(os.path.abspath(args.output)), [args.table], seed)
+        users_path = args.output if args.table == 'users' and not args.keep_shards else None
+        products_path = args.output if args.table == 'product' and not args.keep_shards else None
+    if args.login_fixture:
+        if not users_path or args.format != 'csv' or args.sqlite:
+            print("--login-fixture needs the users table written to a CSV file.", file=sys.stderr)
+        else:
+            logins = export_login_fixture(users_path, args.login_fixture, args.login_limit)
+            print(f"Wrote {logins} logins to {args.login_fixture}.", file=sys.stderr)
+    if args.k6_fixtures:
+        if not (users_path or products_path) or args.format != 'csv' or args.sqlite:
+            print("--k6-fixtures needs the users or product table written to a CSV file.", file=sys.stderr)
+        else:
+            manifest = export_k6_fixtures(args.k6_fixtures, args.k6_vus, users_path, products_path,
+                                          args.k6_per_vu)
+            for scenario, layout in manifest['scenarios'].items():
+                counts = ', '.join(f"{layout[kind]} {kind}" for kind in ('login', 'products') if kind in layout)
+                print(f"Wrote k6 fixtures for {layout['vus']} '{scenario}' VUs ({counts} per VU at least) "
+                      f"to {args.k6_fixtures}.", file=sys.stderr)
+                if layout.get('login') == 0:
+                    print(f"Warning: some '{scenario}' VUs have no login; generate more users.", file=sys.stderr)
+    if args.summary:
+        write_summary(args.summary, seed, perf_counter() - started)
+
+
+def ask(prompt):
+    """Reads an answer from stdin, prompting on stderr so stdout carries only the CSV."""
+    print(prompt, end='', file=sys.stderr, flush=True)
+    return input()
+
+
+def main():
+    if len(sys.argv) > 1:
+        run_cli(sys.argv[1:])
         return
 
-    if headers and data:
-        print_csv(headers, data)
-        print(f"\nGenerated {len(data)} records for the '{table_name}' table.")
+    table_name = ask("Enter table name (users, category, brand, product, product_image, invoice, invoice_item, contact_reply): ").lower()
+    num_data = int(ask("Enter number of records to generate: "))
+
+    if table_name not in TABLE_STREAMS:
+        print("Invalid table name. Please choose from: users, category, brand, product, product_image, invoice, invoice_item, contact_reply.", file=sys.stderr)
+        return
+
+    prepare_parents(table_name)
+    headers, rows = TABLE_STREAMS[table_name](num_data)
+
+    if headers:
+        with Progress(table_name, num_data) as progress:
+            count = write_csv(headers, count_rows(rows, progress.rows_done))
+        print(f"Generated {count} records for the '{table_name}' table.", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
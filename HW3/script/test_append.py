@@ -0,0 +1,61 @@
+"""Extending existing output with --append."""
+import csv
+import os
+import subprocess
+import sys
+
+from test_homework import HOMEWORK, SEED, SHARD_SIZE, SPEC, check_dataset, generate, read, run, same_files, spec
+
+
+def test_append_continues_the_dataset(tmp_path):
+    out_dir = generate(tmp_path, counts=SPEC)
+    extra = {'users': 100, 'product_image': 300, 'invoice': 200, 'invoice_item': 400}
+    # No --seed: the seed is taken from dataset.json.
+    run('--spec', spec(extra), '--out-dir', str(out_dir), '--append', '--shard-size', str(SHARD_SIZE))
+    tables = check_dataset(out_dir)
+    for table, count in extra.items():
+        assert len(tables[table]) == SPEC[table] + count, table
+
+
+def test_append_refuses_a_different_seed(tmp_path):
+    out_dir = generate(tmp_path, counts={'users': 20, 'invoice': 20})
+    result = subprocess.run(
+        [sys.executable, HOMEWORK, '--spec', 'invoice=5', '--out-dir', str(out_dir), '--append',
+         '--seed', str(SEED + 1), '--progress', '0'],
+        capture_output=True, text=True)
+    assert 'differs from the seed' in result.stderr
+    assert len(read(out_dir, 'invoice')) == 20
+
+
+def test_append_keeps_the_columns_of_the_file(tmp_path):
+    generate(tmp_path, counts={'category': 10, 'product': 20})
+    # brand.csv appears only now: the products go on without a brand_id column.
+    run('--spec', 'brand=5,product=10', '--out-dir', str(tmp_path), '--append')
+    with open(tmp_path / 'product.csv', newline='') as product_file:
+        rows = list(csv.reader(product_file))
+    assert 'brand_id' not in rows[0]
+    assert {len(row) for row in rows} == {len(rows[0])}
+    assert len(rows) == 31
+
+    os.remove(tmp_path / 'brand.csv')
+    generate(tmp_path / 'branded', counts={'category': 10, 'brand': 5, 'product': 20})
+    os.remove(tmp_path / 'branded' / 'brand.csv')
+    result = subprocess.run(
+        [sys.executable, HOMEWORK, '--spec', 'product=10', '--out-dir', str(tmp_path / 'branded'), '--append',
+         '--progress', '0'],
+        capture_output=True, text=True)
+    assert 'columns' in result.stderr
+    assert len(read(tmp_path / 'branded', 'product')) == 20
+
+
+def test_append_ignores_a_stale_sort_order_file(tmp_path):
+    counts = {'category': 10, 'product': 50, 'product_image': 200}
+    fresh, stale = generate(tmp_path / 'fresh', counts=counts), generate(tmp_path / 'stale', counts=counts)
+    # Left over from a shorter table: it does not match the file any more.
+    generate(tmp_path / 'short', counts={**counts, 'product_image': 100})
+    os.replace(tmp_path / 'short' / 'product_image.csv.sort-orders', stale / 'product_image.csv.sort-orders')
+    for out_dir in (fresh, stale):
+        run('--spec', 'product_image=150', '--out-dir', str(out_dir), '--append')
+        assert len(read(out_dir, 'product_image')) == 350
+    assert same_files(fresh, stale) == []
+
@@ -0,0 +1,12 @@
+"""Tables served from the --cache dataset cache."""
+from test_homework import generate, same_files
+
+
+def test_cached_tables_match_generated_ones(tmp_path):
+    cache = tmp_path / 'cache'
+    counts = {'users': 100, 'invoice': 200}
+    first = generate(tmp_path / 'first', '--cache', str(cache), counts=counts)
+    second = generate(tmp_path / 'second', '--cache', str(cache), counts=counts)
+    assert same_files(first, second) == []
+    assert same_files(first, generate(tmp_path / 'uncached', counts=counts)) == []
+
@@ -0,0 +1,98 @@
+"""Invariants of the generated dataset, checked on real homework.py runs.
+
+Tables are generated with small shards so that every table crosses several
+shard boundaries, once with one worker and once with several.
+"""
+import collections
+import csv
+import filecmp
+import os
+import subprocess
+import sys
+
+import pytest
+
+HOMEWORK = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'homework.py')
+AS_OF = '2025-06-01 12:00:00'
+SEED = 11
+SPEC = {
+    'users': 400, 'category': 60, 'brand': 40, 'product': 300, 'product_image': 700,
+    'invoice': 600, 'invoice_item': 1500, 'contact_reply': 200,
+}
+SHARD_SIZE = 150
+
+
+def run(*args):
+    """Runs homework.py with args and the fixed clock; fails the test on a non-zero exit."""
+    command = [sys.executable, HOMEWORK, *args, '--as-of', AS_OF, '--progress', '0']
+    result = subprocess.run(command, cwd=os.path.dirname(HOMEWORK), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return result
+
+
+def spec(counts):
+    return ','.join(f"{table}={count}" for table, count in counts.items())
+
+
+def generate(out_dir, *args, workers=1, counts=SPEC):
+    run('--spec', spec(counts), '--out-dir', str(out_dir), '--seed', str(SEED),
+        '--workers', str(workers), '--shard-size', str(SHARD_SIZE), *args)
+    return out_dir
+
+
+def read(out_dir, table):
+    with open(os.path.join(out_dir, f'{table}.csv'), newline='') as table_file:
+        return list(csv.DictReader(table_file))
+
+
+def same_files(left, right):
+    names = sorted(name for name in os.listdir(left) if name.endswith('.csv'))
+    assert names == sorted(name for name in os.listdir(right) if name.endswith('.csv'))
+    _, mismatches, errors = filecmp.cmpfiles(left, right, names, shallow=False)
+    return mismatches + errors
+
+
+def check_dataset(out_dir):
+    """Asserts every cross-row and cross-table invariant of a generated dataset."""
+    tables = {table: read(out_dir, table) for table in SPEC}
+    for table, rows in tables.items():
+        assert [int(row['id']) for row in rows] == list(range(1, len(rows) + 1)), table
+
+    emails = [user['email'] for user in tables['users']]
+    assert len(set(emails)) == len(emails)
+    for table in ('category', 'brand'):
+        slugs = [row['slug'] for row in tables[table]]
+        assert len(set(slugs)) == len(slugs), table
+
+    users = {user['id']: user for user in tables['users']}
+    for invoice in tables['invoice']:
+        user = users[invoice['user_id']]
+        for column in ('address', 'city', 'state', 'country', 'postcode'):
+            assert invoice[f'billing_{column}'] == user[column], (invoice['id'], column)
+
+    prices = collections.defaultdict(set)
+    for item in tables['invoice_item']:
+        prices[item['product_id']].add(item['unit_price'])
+    assert all(len(unit_prices) == 1 for unit_prices in prices.values())
+
+    images = collections.Counter()
+    for image in tables['product_image']:
+        images[image['product_id']] += 1
+        assert int(image['sort_order']) == images[image['product_id']], image['id']
+        assert image['image_url'].endswith(f"/{image['product_id']}_{image['sort_order']}.jpg")
+        if image['sort_order'] == '1':
+            assert image['is_thumbnail'] == '1'
+    return tables
+
+
+@pytest.fixture(scope='module')
+def single_worker(tmp_path_factory):
+    return generate(tmp_path_factory.mktemp('single'))
+
+
+def test_dataset_invariants_hold_across_shards(single_worker):
+    check_dataset(single_worker)
+
+
+def test_output_does_not_depend_on_worker_count(single_worker, tmp_path):
+    assert same_files(single_worker, generate(tmp_path, workers=3)) == []
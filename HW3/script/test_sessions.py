@@ -0,0 +1,37 @@
+"""GeneratorSession runs in-process: sessions must not see each other's state."""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import homework
+
+CLOCK = datetime(2025, 6, 1, 12)
+TABLES = (('users', 60), ('category', 80), ('brand', 40), ('product', 50), ('invoice', 80))
+
+
+def generate(seed):
+    with homework.GeneratorSession(seed=seed, clock=CLOCK) as session:
+        return {table: session.generate(table, count)[1] for table, count in TABLES}
+
+
+def test_sessions_run_concurrently():
+    alone = {seed: generate(seed) for seed in (1, 2, 3)}
+    with ThreadPoolExecutor(max_workers=7) as executor:
+        runs = [executor.submit(generate, seed) for seed in [1, 2, 3] * 2]
+        # The module's names keep changing while the sessions run; theirs must not.
+        for seed in range(200):
+            homework.use_names(seed)
+        together = [run.result() for run in runs]
+    homework.use_names(0)
+    assert together == [alone[1], alone[2], alone[3]] * 2
+
+
+def test_sessions_interleave_in_one_thread():
+    alone = {seed: generate(seed) for seed in (1, 2)}
+    with homework.GeneratorSession(seed=1, clock=CLOCK) as first, \
+            homework.GeneratorSession(seed=2, clock=CLOCK) as second:
+        for table, count in TABLES:
+            _, first_rows = first.stream(table, count)
+            _, second_rows = second.stream(table, count)
+            pairs = list(zip(first_rows, second_rows))
+            assert [pair[0] for pair in pairs] == alone[1][table], table
+            assert [pair[1] for pair in pairs] == alone[2][table], table
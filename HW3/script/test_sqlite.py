@@ -0,0 +1,14 @@
+"""Tables loaded into SQLite with --sqlite."""
+import sqlite3
+
+from test_homework import SEED, SHARD_SIZE, run
+
+
+def test_sqlite_columns_are_typed(tmp_path):
+    database = tmp_path / 'toolshop.db'
+    run('--spec', 'category=10,product=300', '--sqlite', str(database), '--seed', str(SEED),
+        '--shard-size', str(SHARD_SIZE))
+    with sqlite3.connect(database) as connection:
+        assert connection.execute("SELECT typeof(id), typeof(price) FROM products LIMIT 1").fetchone() == \
+            ('integer', 'real')
+        assert connection.execute("SELECT max(id) FROM products").fetchone() == (300,)
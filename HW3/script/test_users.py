@@ -0,0 +1,13 @@
+"""Users generated against a fixed clock."""
+from datetime import datetime
+
+from test_homework import AS_OF, SEED, read, run
+
+
+def test_dates_of_birth_follow_the_run_clock(tmp_path):
+    run('users', '500', '-o', str(tmp_path / 'users.csv'), '--seed', str(SEED))
+    today = datetime.strptime(AS_OF, '%Y-%m-%d %H:%M:%S').date()
+    births = [datetime.strptime(user['dob'], '%Y-%m-%d').date() for user in read(tmp_path, 'users')]
+    # Between 18 and 90 years old on the --as-of day, whatever day the test runs.
+    assert min(births) > today.replace(year=today.year - 91)
+    assert max(births) <= today.replace(year=today.year - 18)
@@ -0,0 +1,11 @@
+"""Tables generated with --vectorized (needs NumPy)."""
+import pytest
+
+from test_homework import check_dataset, generate, same_files
+
+
+def test_vectorized_output_keeps_invariants(tmp_path):
+    pytest.importorskip('numpy')
+    single = generate(tmp_path / 'single', '--vectorized')
+    check_dataset(single)
+    assert same_files(single, generate(tmp_path / 'parallel', '--vectorized', workers=3)) == []
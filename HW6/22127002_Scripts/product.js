@@ -3,6 +3,8 @@
 // Data-driven:
 //   - data/login.csv    (header: email,password)
 //   - data/products.csv (header: Name)
+//   or, with FIXTURES=<dir> written by `homework.py --k6-fixtures <dir> --k6-vus ...`,
+//   one login/NNNN.csv and products/NNNN.csv per VU, so no two VUs share an account
 
 import http from 'k6/http';
 import { check, sleep, group } from 'k6';
@@ -12,15 +14,87 @@ import { htmlReport } from 'https://raw.githubusercontent.com/benc-uk/k6-reporte
 // ---- Config ----
 const BASE_URL = __ENV.BASE_URL || 'http://localhost:8091';
 const DEBUG = (__ENV.DEBUG || '0') === '1';
+const FIXTURES = __ENV.FIXTURES || '';
+
+//SET MODE for different scenario testing
+const MODE = (__ENV.MODE || 'load'); //stress; spike and volume
+
+// Scenario per MODE; also tells the fixture check below how many VUs to expect.
+const scenariosByMode = {
+  stress: {
+    executor: 'ramping-vus',
+    startVUs: 0,
+    stages: [
+      {duration: '20s', target:10}, //Ramp up to 10 VUs Slightly
+      {duration: '10s', target:25}, // Keep  Ramp upper average
+      {duration: '10s', target:35}, //Ramp to reach the peek
+      {duration: '30s', target: 35}, // Maintain peak
+      { duration: '20s', target: 20 }, //Recover
+      {duration: '20s', target:0 },
+      ],
+      gracefulRampDown: '30s',
+      gracefulStop: '30s', 
+  },
+spike: {
+  executor: 'ramping-vus',
+    startVUs: 0,
+      stages: [
+        { duration: '30s', target: 100 }, // spike high
+        { duration: '30s', target: 0 }, // Spike drop
+      ],
+        gracefulRampDown: '10s',
+        gracefulStop: '10s',
+  },
+  volume: {
+    executor: 'shared-iterations',
+    vus: 30,                //VU parallel
+    iterations:3000,     //total iterations
+    maxDuration: '5m',     //time limit
+    gracefulStop: '30s',
+  },
+  load: {
+     executor: 'ramping-vus',
+      startVUs: 0,
+      stages: [
+        { duration: '15s', target: 15 }, // ramp up
+        { duration: '30s', target: 30 }, // steady
+        { duration: '15s', target: 0  }, // ramp down
+      ],
+      gracefulRampDown: '15s',
+      gracefulStop: '15s',
+  }
+};
+
+// Most VUs a scenario runs at once.
+function peakVus(scenario) {
+  if (scenario.vus) return scenario.vus;
+  return Math.max(scenario.startVUs || 0, ...(scenario.stages || []).map(stage => stage.target));
+}
 
 // ---- Utils ----
 function clean(s = '') { return s.replace(/^"+|"+$/g, '').trim(); }
 function jsonHeaders() { return { 'Content-Type': 'application/json', Accept: 'application/json' }; }
 function bearerHeaders(token) { return { Authorization: `Bearer ${token}`, Accept: 'application/json' }; }
 
+// ---- Data: per-VU fixture files ----
+// Each VU opens only its own slice. A VU beyond the number the fixtures were
+// written for stops the test in init: sharing another VU's files would share
+// its accounts too.
+function vuFixturePath(kind) {
+  const manifest = JSON.parse(open(`${FIXTURES}/k6-fixtures.json`));
+  const scenario = manifest.scenarios[MODE] || manifest.scenarios.default;
+  if (!scenario) throw new Error(`${FIXTURES} has no fixtures for scenario ${MODE}.`);
+  if (__VU > scenario.vus) {
+    throw new Error(`${FIXTURES} has fixtures for ${scenario.vus} VUs, but ${MODE} runs VU ${__VU}; ` +
+      `regenerate them with --k6-vus ${MODE}=${peakVus(scenariosByMode[MODE])}.`);
+  }
+  const dir = scenario.dir ? `${FIXTURES}/${scenario.dir}` : FIXTURES;
+  return `${dir}/${kind}/${String(Math.max(1, __VU)).padStart(4, '0')}.csv`;
+}
+function vuFixture(kind) { return open(vuFixturePath(kind)); }
+
 // ---- Data: login.csv ----
-const users = new SharedArray('users', () => {
-  const raw = open('../data/login.csv');
+function parseLogins(raw) {
   const lines = raw.split(/\r?\n/).filter(l => l.trim() !== '');
   if (lines.length < 2) throw new Error('login.csv is empty.');
   const header = lines[0].trim();
@@ -32,12 +106,17 @@ const users = new SharedArray('users', () => {
   }).filter(Boolean);
   if (DEBUG) console.log(`[INIT] Loaded ${out.length} users`);
   return out;
-});
+}
+const users = FIXTURES
+  ? parseLogins(vuFixture('login'))
+  : new SharedArray('users', () => parseLogins(open('../data/login.csv')));
 
 // ---- Data: products.csv ----
-const productNames = new SharedArray('productNames', () => {
+function loadProductNames(path) {
+  // Outside the try: a VU without fixture files must not fall back to 'Hammer'.
+  const file = FIXTURES ? vuFixturePath('products') : path;
   try {
-    const raw = open('../data/products.csv').trim();
+    const raw = open(file).trim();
     const lines = raw.split(/\r?\n/);
     const header = lines[0].trim();
     const delim = header.includes(';') ? ';' : ',';
@@ -49,7 +128,10 @@ const productNames = new SharedArray('productNames', () => {
   } catch {
     return ['Hammer'];
   }
-});
+}
+const productNames = FIXTURES
+  ? loadProductNames()
+  : new SharedArray('productNames', () => loadProductNames('../data/products.csv'));
 
 // ---- Token cache per VU ----
 let tokenCache = null;
@@ -83,54 +165,6 @@ function getProductIdByName(name, hdrs) {
   return null;
 }
 
-//SET MODE for different scenario testing
-const MODE = (__ENV.MODE || 'load'); //stress; spike and volume
-
-const scenariosByMode = {
-  stress: {
-    executor: 'ramping-vus',
-    startVUs: 0,
-    stages: [
-      {duration: '20s', target:10}, //Ramp up to 10 VUs Slightly
-      {duration: '10s', target:25}, // Keep  Ramp upper average
-      {duration: '10s', target:35}, //Ramp to reach the peek
-      {duration: '30s', target: 35}, // Maintain peak
-      { duration: '20s', target: 20 }, //Recover
-      {duration: '20s', target:0 },
-      ],
-      gracefulRampDown: '30s',
-      gracefulStop: '30s', 
-  },
-spike: {
-  executor: 'ramping-vus',
-    startVUs: 0,
-      stages: [
-        { duration: '30s', target: 100 }, // spike high
-        { duration: '30s', target: 0 }, // Spike drop
-      ],
-        gracefulRampDown: '10s',
-        gracefulStop: '10s',
-  },
-  volume: {
-    executor: 'shared-iterations',
-    vus: 30,                //VU parallel
-    iterations:3000,     //total iterations
-    maxDuration: '5m',     //time limit
-    gracefulStop: '30s',
-  },
-  load: {
-     executor: 'ramping-vus',
-      startVUs: 0,
-      stages: [
-        { duration: '15s', target: 15 }, // ramp up
-        { duration: '30s', target: 30 }, // steady
-        { duration: '15s', target: 0  }, // ramp down
-      ],
-      gracefulRampDown: '15s',
-      gracefulStop: '15s',
-  }
-};
-
 //Setup threshold by mode
 const thresholdsByMode = {
   stress: {